@@ -0,0 +1,111 @@
+import logging
+import google.generativeai as genai
+import re # For parsing
+from typing import Dict, Tuple
+
+from src.models.state import WorkflowState, PlatformContent
+
+logger = logging.getLogger(__name__)
+
+# A complete vf_params line; the trailing newline shows the model has finished writing it
+VF_PARAMS_LINE = re.compile(r"^vf_params:\s*\S.*\n", re.MULTILINE | re.IGNORECASE)
+
+class FormatterAgent:
+    """
+    Formats content for one platform using Gemini API for suggestions.
+
+    Subclasses only describe their platform; prompting, parsing and the
+    formatting loop are shared.
+    """
+    platform_name: str = ""
+    # Prompt guidance; {aspect_ratio} is filled in from the target specs
+    format_guidance: str = ""
+    # Used as the example in the prompt and whenever Gemini's answer can't be used
+    default_params: Dict[str, str] = {}
+    # A suggested vf filter must contain one of these to be accepted
+    accepted_filters: Tuple[str, ...] = ("crop=", "scale=")
+
+    def __init__(self, api_key: str):
+        if not api_key:
+            raise ValueError("Gemini API key is required.")
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel('gemini-1.5-flash') # Or choose another appropriate model
+        logger.info(f"{self.platform_name}FormatterAgent initialized with Gemini model.")
+
+    def _generate_format_prompt(self, content_item: PlatformContent) -> str:
+        """Creates the prompt for Gemini API formatting analysis."""
+        moment = content_item.source_moment
+        specs = content_item.target_specs
+        prompt = (
+            f"Analyze the following video moment description for formatting on {self.platform_name}:\n"
+            f"- Description: {moment.description}\n"
+            f"- Duration: {moment.duration:.1f} seconds\n"
+            f"- Content Category: {moment.content_category}\n\n"
+            f"Target {self.platform_name} Specifications:\n"
+            f"- Aspect Ratio: {specs.aspect_ratio}\n"
+            f"- Resolution: {specs.resolution[0]}x{specs.resolution[1]}\n"
+            f"- Optimal Format: {specs.optimal_format}\n\n"
+            f"Based *only* on the description, suggest FFmpeg parameters for the 'vf' (video filter) option to best format this moment. "
+            f"{self.format_guidance.format(aspect_ratio=specs.aspect_ratio)}"
+            f"Provide *only* the parameter string suitable for an ffmpeg command, like this:\n"
+            f"vf_params: {self.default_params['vf']}\n"
+            f"(Ensure the output resolution matches {specs.resolution[0]}x{specs.resolution[1]})."
+        )
+        # Note: A real implementation would pass frame/video data for visual analysis.
+        return prompt
+
+    def _generate_params_text(self, prompt: str) -> str:
+        """Streams the Gemini response and stops reading once the vf_params line is complete."""
+        text = ""
+        for chunk in self.model.generate_content(prompt, stream=True):
+            text += chunk.text
+            # Anything after the parameters (explanations, caveats) is ignored by the parser
+            if VF_PARAMS_LINE.search(text):
+                break
+        return text
+
+    def _parse_ffmpeg_params(self, response_text: str) -> dict:
+        """Extracts vf parameters from Gemini response (simple parsing)."""
+        # Look for a line starting with vf_params: optionally followed by space
+        match = re.search(r"^vf_params:\s*(.*)", response_text, re.MULTILINE | re.IGNORECASE)
+        if match:
+            vf_filter = match.group(1).strip()
+            if any(f in vf_filter for f in self.accepted_filters):
+                 return {"vf": vf_filter, "aspect": self.default_params["aspect"]}
+        # Fallback to default if parsing fails
+        logger.warning("    ! Failed to parse vf_params from Gemini response, using default.")
+        return dict(self.default_params)
+
+    def format_content(self, state: WorkflowState) -> WorkflowState:
+        """
+        Processes content routed to this platform, using Gemini to define formatting specs.
+        """
+        logger.info(f"--- Running {self.platform_name} Formatter Agent (using Gemini API) ---")
+        if self.platform_name in state.platform_content:
+            for content_item in state.platform_content[self.platform_name]:
+                if content_item.processing_status == "pending_format":
+                    logger.info(f"  Formatting for {self.platform_name}: Moment {content_item.source_moment.start_time_str} ({content_item.source_moment.description[:30]}...)")
+
+                    prompt = self._generate_format_prompt(content_item)
+
+                    try:
+                        logger.info("    > Calling Gemini API for formatting analysis...")
+                        analysis_text = self._generate_params_text(prompt)
+                        logger.info(f"    < Gemini Response:\n{analysis_text}")
+
+                        ffmpeg_params = self._parse_ffmpeg_params(analysis_text)
+                        content_item.ffmpeg_params = ffmpeg_params
+                        content_item.processing_status = "formatting_specs_defined"
+                        logger.info(f"    -> Specs defined (via Gemini): {content_item.ffmpeg_params}")
+
+                    except Exception as e:
+                        logger.error(f"    ! Error calling Gemini API or parsing response: {e}")
+                        # Fallback to default parameters on error
+                        content_item.ffmpeg_params = dict(self.default_params)
+                        content_item.processing_status = "formatting_specs_defined" # Mark as defined even if default
+                        logger.info(f"    -> Specs defined (Default Fallback): {content_item.ffmpeg_params}")
+                        state.error = f"Gemini formatting failed for {self.platform_name} moment {content_item.source_moment.start_time_str}: {e}"
+
+
+        logger.info(f"--- {self.platform_name} Formatter Agent Finished ---")
+        return state
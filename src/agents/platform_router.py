@@ -1,10 +1,14 @@
 import os
+import json
 import google.generativeai as genai
 from typing import List, Dict
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 from src.models.state import WorkflowState, SelectedMoment, PlatformContent, PlatformRequirements, SUPPORTED_PLATFORMS, PLATFORM_INSTAGRAM, PLATFORM_TIKTOK, PLATFORM_LINKEDIN
 
+logger = logging.getLogger(__name__)
+
 # Platform requirements (keep these defined)
 PLATFORM_SPECS = {
     PLATFORM_INSTAGRAM: PlatformRequirements(
@@ -21,6 +25,41 @@ PLATFORM_SPECS = {
     ),
 }
 
+# Moments per routing request; longer lists are split into batches sent concurrently
+MAX_MOMENTS_PER_REQUEST = 20
+MAX_CONCURRENT_REQUESTS = 8
+
+# Constrains Gemini's JSON mode to the routing structure the parser expects
+_PLATFORM_ROUTING_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "suitable": {"type": "BOOLEAN"},
+        "reason": {"type": "STRING"},
+    },
+    "required": ["suitable", "reason"],
+}
+ROUTING_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "results": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "moment_id": {"type": "STRING"},
+                    "routing": {
+                        "type": "OBJECT",
+                        "properties": {p: _PLATFORM_ROUTING_SCHEMA for p in SUPPORTED_PLATFORMS},
+                        "required": list(SUPPORTED_PLATFORMS),
+                    },
+                },
+                "required": ["moment_id", "routing"],
+            },
+        },
+    },
+    "required": ["results"],
+}
+
 class PlatformRouterAgent:
     """
     Analyzes selected moments using the Gemini API and routes them to appropriate platforms.
@@ -31,7 +70,7 @@ class PlatformRouterAgent:
             raise ValueError("Gemini API key is required.")
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel('gemini-1.5-flash') # Or choose another appropriate model
-        print("PlatformRouterAgent initialized with Gemini model.")
+        logger.info("PlatformRouterAgent initialized with Gemini model.")
 
     def _generate_batch_routing_prompt(self, moments: List[SelectedMoment]) -> str:
         """Creates a single prompt for Gemini API routing analysis for multiple moments."""
@@ -62,10 +101,62 @@ class PlatformRouterAgent:
         )
         return prompt
 
+    def _add_routed_content(self, routed_content: Dict[str, List[PlatformContent]], moment: SelectedMoment,
+                            platform_name: str, is_suitable: bool, reason: str) -> None:
+        """Adds a moment to a platform's content if it is suitable and within the platform's max duration."""
+        if is_suitable and platform_name in PLATFORM_SPECS:
+            specs = PLATFORM_SPECS[platform_name]
+            if moment.duration <= specs.max_duration:
+                logger.info(f"    --> Adding {platform_name} to routing list.")
+                content = PlatformContent(
+                    platform=platform_name,
+                    source_moment=moment,
+                    target_specs=specs,
+                    processing_status="pending_format"
+                )
+                routed_content[platform_name].append(content)
+            else:
+                logger.info(f"    --> Skipped {platform_name} (duration {moment.duration:.1f}s > max {specs.max_duration:.1f}s)")
+        elif not is_suitable:
+             logger.info(f"    -> Determined Unsuitable for {platform_name}. Reason: {reason}")
+
+    def _parse_json_response(self, response_text: str, moments: List[SelectedMoment]) -> Dict[str, List[PlatformContent]]:
+        """Parses a JSON-mode Gemini response; raises ValueError if it doesn't match the routing schema."""
+        try:
+            results = json.loads(response_text)["results"]
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Unexpected routing response structure: {e}")
+        if not isinstance(results, list) or not all(isinstance(r, dict) for r in results):
+            raise ValueError("Routing results are not a list of objects")
+        
+        routed_content: dict[str, list[PlatformContent]] = {p: [] for p in SUPPORTED_PLATFORMS}
+        moment_map = {f"MOMENT_{i+1}": moment for i, moment in enumerate(moments)}
+        for result in results:
+            moment_id = result.get("moment_id")
+            moment = moment_map.get(moment_id)
+            if not moment:
+                logger.warning(f"Found routing for unknown {moment_id}, skipping.")
+                continue
+            
+            logger.info(f"  Processing routing for {moment_id} ({moment.description[:30]}...)")
+            routing = result.get("routing") or {}
+            for platform_name in SUPPORTED_PLATFORMS:
+                platform_routing = routing.get(platform_name) or {}
+                is_suitable = platform_routing.get("suitable") is True
+                reason = str(platform_routing.get("reason", "Not provided")).replace('\n', ' ')
+                self._add_routed_content(routed_content, moment, platform_name, is_suitable, reason)
+        
+        return routed_content
+
     def _parse_batch_response(self, response_text: str, moments: List[SelectedMoment]) -> Dict[str, List[PlatformContent]]:
-        """Parses the Gemini response using regex for more robustness."""
+        """Parses the Gemini response, as JSON when possible and otherwise using regex for more robustness."""
         import re
         
+        try:
+            return self._parse_json_response(response_text, moments)
+        except ValueError as e:  # Includes JSONDecodeError
+            logger.warning(f"Routing response is not schema-conforming JSON ({e}); falling back to regex parsing.")
+        
         routed_content: dict[str, list[PlatformContent]] = {p: [] for p in SUPPORTED_PLATFORMS}
         moment_map = {f"MOMENT_{i+1}": moment for i, moment in enumerate(moments)}
 
@@ -74,10 +165,10 @@ class PlatformRouterAgent:
         moment_blocks = re.findall(r'{\s*"moment_id":\s*"(MOMENT_\d+)",\s*"routing":\s*({.*?})\s*}', response_text, re.DOTALL)
 
         if not moment_blocks:
-             logging.warning(f"Could not find any moment blocks using regex in response:\n{response_text}")
+             logger.warning(f"Could not find any moment blocks using regex in response:\n{response_text}")
              # Try a simpler regex if the above failed, looking just for suitability lines per platform
              # This is a fallback and less structured
-             print("  Attempting fallback regex parsing...")
+             logger.info("  Attempting fallback regex parsing...")
              # Example fallback (less reliable): extract suitability per platform based on keywords
              # This would need significant refinement based on observed response variations.
              # For now, let's raise an error if the primary regex fails.
@@ -86,10 +177,10 @@ class PlatformRouterAgent:
         for moment_id, routing_block_str in moment_blocks:
             moment = moment_map.get(moment_id)
             if not moment:
-                logging.warning(f"Found block for unknown {moment_id}, skipping.")
+                logger.warning(f"Found block for unknown {moment_id}, skipping.")
                 continue
                 
-            print(f"  Processing routing for {moment_id} ({moment.description[:30]}...)")
+            logger.info(f"  Processing routing for {moment_id} ({moment.description[:30]}...)")
 
             # Parse suitability for each platform within this moment's block
             for platform_name in SUPPORTED_PLATFORMS:
@@ -108,69 +199,78 @@ class PlatformRouterAgent:
                     suitability_str = platform_match.group(1).lower()
                     is_suitable = (suitability_str == 'true')
                     reason = platform_match.group(2).strip().replace('\n', ' ') # Clean reason
-                    print(f"    -> Parsed for {platform_name}: Suitable={is_suitable}. Reason: {reason}")
+                    logger.info(f"    -> Parsed for {platform_name}: Suitable={is_suitable}. Reason: {reason}")
                 else:
-                    logging.warning(f"Could not parse details for {platform_name} in block for {moment_id}")
-                    print(f"    -> Failed to parse details for {platform_name}")
+                    logger.warning(f"Could not parse details for {platform_name} in block for {moment_id}")
+                    logger.info(f"    -> Failed to parse details for {platform_name}")
                     # Attempt to find suitability just by keyword as a last resort
                     if f'"{platform_name}":' in routing_block_str and '"suitable": true' in routing_block_str.split(f'"{platform_name}":')[1]:
                          is_suitable = True
                          reason = "Parsed fallback: suitable=true"
-                         print(f"    -> Fallback Parse for {platform_name}: Suitable=true")
+                         logger.info(f"    -> Fallback Parse for {platform_name}: Suitable=true")
                     elif f'"{platform_name}":' in routing_block_str and '"suitable": false' in routing_block_str.split(f'"{platform_name}":')[1]:
                          is_suitable = False
                          reason = "Parsed fallback: suitable=false"
-                         print(f"    -> Fallback Parse for {platform_name}: Suitable=false")
+                         logger.info(f"    -> Fallback Parse for {platform_name}: Suitable=false")
 
                 # Add to routed_content if suitable and passes duration check
-                if is_suitable and platform_name in PLATFORM_SPECS:
-                    specs = PLATFORM_SPECS[platform_name]
-                    if moment.duration <= specs.max_duration:
-                        print(f"    --> Adding {platform_name} to routing list.")
-                        content = PlatformContent(
-                            platform=platform_name,
-                            source_moment=moment,
-                            target_specs=specs,
-                            processing_status="pending_format"
-                        )
-                        routed_content[platform_name].append(content)
-                    else:
-                        print(f"    --> Skipped {platform_name} (duration {moment.duration:.1f}s > max {specs.max_duration:.1f}s)")
-                elif not is_suitable:
-                     print(f"    -> Determined Unsuitable for {platform_name}. Reason: {reason}")
+                self._add_routed_content(routed_content, moment, platform_name, is_suitable, reason)
             
         return routed_content
 
+    def _route_batch(self, moments: List[SelectedMoment]) -> Dict[str, List[PlatformContent]]:
+        """Routes one batch of moments with a single Gemini API call."""
+        prompt = self._generate_batch_routing_prompt(moments)
+        logger.info(f"    > Calling Gemini API for batch routing analysis ({len(moments)} moments)...")
+        # Consider adding safety_settings if needed
+        # JSON mode with a schema returns the results object directly, without code fences
+        response = self.model.generate_content(
+            prompt,
+            generation_config={
+                "response_mime_type": "application/json",
+                "response_schema": ROUTING_RESPONSE_SCHEMA,
+            }
+        )
+        analysis_text = response.text
+        logger.info(f"    < Gemini Batch Response:\n{analysis_text}")
+        return self._parse_batch_response(analysis_text, moments)
+
     def route_moments(self, state: WorkflowState) -> WorkflowState:
         """
         Uses a single Gemini API call to determine platform suitability and updates the state.
+        Moment lists too long for one prompt are split into batches that are routed concurrently.
         """
-        print("--- Running Platform Router Agent (using Gemini API - Batch Mode) ---")
+        logger.info("--- Running Platform Router Agent (using Gemini API - Batch Mode) ---")
         
         if not state.selected_moments:
-             print("  No moments selected, skipping routing.")
+             logger.info("  No moments selected, skipping routing.")
              state.platform_content = {p: [] for p in SUPPORTED_PLATFORMS}
              return state
              
-        prompt = self._generate_batch_routing_prompt(state.selected_moments)
+        batches = [state.selected_moments[i:i + MAX_MOMENTS_PER_REQUEST]
+                   for i in range(0, len(state.selected_moments), MAX_MOMENTS_PER_REQUEST)]
             
         try:
-            print(f"    > Calling Gemini API for batch routing analysis ({len(state.selected_moments)} moments)...")
-            # Consider adding safety_settings if needed
-            response = self.model.generate_content(prompt)
-            analysis_text = response.text
-            print(f"    < Gemini Batch Response:\n{analysis_text}")
-
-            routed_content = self._parse_batch_response(analysis_text, state.selected_moments)
+            if len(batches) == 1:
+                batch_results = [self._route_batch(batches[0])]
+            else:
+                with ThreadPoolExecutor(max_workers=min(len(batches), MAX_CONCURRENT_REQUESTS)) as executor:
+                    batch_results = list(executor.map(self._route_batch, batches))
+            
+            # Merge in batch order so content keeps the selected moments' order
+            routed_content: dict[str, list[PlatformContent]] = {p: [] for p in SUPPORTED_PLATFORMS}
+            for batch_content in batch_results:
+                for platform_name, contents in batch_content.items():
+                    routed_content[platform_name].extend(contents)
             state.platform_content = routed_content
             state.error = None # Clear error if successful
 
         except Exception as e:
             error_msg = f"Error during batch Gemini call or parsing: {e}"
-            print(f"    ! {error_msg}")
+            logger.error(f"    ! {error_msg}")
             state.error = error_msg
             # Ensure platform_content is empty dict on error to prevent partial states
             state.platform_content = {p: [] for p in SUPPORTED_PLATFORMS}
                 
-        print(f"--- Platform Router Agent Finished ---")
-        return state 
\ No newline at end of file
+        logger.info(f"--- Platform Router Agent Finished ---")
+        return state
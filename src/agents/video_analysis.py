@@ -8,6 +8,7 @@ import logging # Use logging
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from src.tools.gemini_client import GeminiClient
+from src.tools.video_utils import extract_video_metadata
 from src.models.state import VideoMoment, WorkflowState # Import WorkflowState
 
 def video_analysis_agent(state: WorkflowState) -> WorkflowState:
@@ -44,6 +45,13 @@ def video_analysis_agent(state: WorkflowState) -> WorkflowState:
         state.moments = moments
         logging.info(f"Analysis found {len(moments)} potential moments.")
         
+        # Keep the probe result (memoized by the analysis) so the report doesn't re-probe.
+        # A cache hit skips the probe, so it can fail here; the report falls back to its own probe
+        try:
+            state.video_metadata = extract_video_metadata(video_path)
+        except (ValueError, OSError) as e:
+            logging.warning(f"Could not probe video metadata for {video_path}: {e}")
+        
         # Clear any previous error if successful
         state.error = None 
         return state
@@ -8,6 +8,7 @@ import os
 import argparse
 import logging
 from pathlib import Path
+from typing import Tuple
 
 # Add the project root to the Python path
 project_root = Path(__file__).resolve().parent.parent
@@ -15,6 +16,24 @@ sys.path.insert(0, str(project_root))
 
 from src.utils.checkpoint_manager import CheckpointManager
 
+def count_checkpoint_files(checkpoint_dir: Path) -> Tuple[int, int]:
+    """
+    Count backup and reset files with a single directory read.
+
+    Args:
+        checkpoint_dir: Directory containing checkpoint files
+
+    Returns:
+        Tuple of (backup file count, reset file count)
+    """
+    backup_count = reset_count = 0
+    with os.scandir(checkpoint_dir) as it:
+        for entry in it:
+            # Substring checks match the "*_backup_*" / "*_reset_*" globs without building Paths
+            backup_count += "_backup_" in entry.name
+            reset_count += "_reset_" in entry.name
+    return backup_count, reset_count
+
 def main():
     """Clean up checkpoint backup files."""
     parser = argparse.ArgumentParser(description="Clean up checkpoint backup files.")
@@ -51,25 +70,23 @@ def main():
         return
     
     # Count files before cleanup
-    backup_files_before = list(checkpoint_dir.glob("*_backup_*.json"))
-    reset_files_before = list(checkpoint_dir.glob("*_reset_*.json"))
-    total_before = len(backup_files_before) + len(reset_files_before)
+    backups_before, resets_before = count_checkpoint_files(checkpoint_dir)
+    total_before = backups_before + resets_before
     
-    logging.info(f"Found {len(backup_files_before)} backup files and {len(reset_files_before)} reset files")
+    logging.info(f"Found {backups_before} backup files and {resets_before} reset files")
     
     # Perform cleanup
     logging.info(f"Cleaning up checkpoint files, keeping max {args.max_backups} backups per checkpoint...")
     CheckpointManager.cleanup_all_backups(str(checkpoint_dir), args.max_backups)
     
     # Count files after cleanup
-    backup_files_after = list(checkpoint_dir.glob("*_backup_*.json"))
-    reset_files_after = list(checkpoint_dir.glob("*_reset_*.json"))
-    total_after = len(backup_files_after) + len(reset_files_after)
+    backups_after, resets_after = count_checkpoint_files(checkpoint_dir)
+    total_after = backups_after + resets_after
     
     # Report results
     removed_count = total_before - total_after
     logging.info(f"Cleanup complete! Removed {removed_count} files")
-    logging.info(f"Remaining: {len(backup_files_after)} backup files and {len(reset_files_after)} reset files")
+    logging.info(f"Remaining: {backups_after} backup files and {resets_after} reset files")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
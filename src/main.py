@@ -19,10 +19,11 @@ sys.path.insert(0, str(project_root))
 # Existing pipeline imports
 # from src.workflows.pipeline import run_pipeline, STAGE_EXTRACT_FRAMES, STAGE_ANALYZE_FRAMES, STAGE_DETECT_MOMENTS, STAGE_GENERATE_REPORT
 # from src.workflows.pipeline import create_basic_pipeline # Assuming basic pipeline is refactored - Removed for now
-from src.visualization.report import extract_thumbnails, display_analysis_results
+from src.visualization.report import extract_thumbnail_images, display_analysis_results
 from src.utils.checkpoint_manager import CheckpointManager
 from src.models.state import WorkflowState, SelectedMoment # Import the state model
 from src.tools.format_validation import generate_preview_thumbnail
+from src.utils.logging_setup import setup_logging
 
 # Branching workflow imports
 from src.workflows.branching_workflow import create_branching_workflow
@@ -132,6 +133,7 @@ def get_stage_name(stage_id):
 def main():
     """Run the selected video analysis workflow."""
     args = parse_arguments()
+    setup_logging()
     
     checkpoint_dir = Path(args.checkpoint_dir)
     checkpoint_dir.mkdir(parents=True, exist_ok=True)
@@ -427,10 +429,10 @@ def main():
     print("\nGenerating HTML report...")
     try:
         # Extract thumbnails for the *original* selected moments for the report
-        thumbnail_dir = output_dir / "thumbnails"
-        print(f"Extracting base thumbnails to {thumbnail_dir}...")
+        # They are kept in memory and embedded in the report, so it is a single self-contained file
+        print("Extracting base thumbnails...")
         # Need to ensure 'selected_moments' are available and correctly formatted
-        thumbnails = extract_thumbnails(video_path, selected_moments, output_dir=str(thumbnail_dir))
+        thumbnails = extract_thumbnail_images(video_path, selected_moments)
         
         # Pass the final result (which should contain all state info)
         report_path = display_analysis_results(video_path, final_result, thumbnails)
@@ -2,7 +2,7 @@
 
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, List, Tuple, Dict, Any, ClassVar
+from typing import Optional, List, Tuple, Dict, Any, ClassVar, Set
 import os
 
 from pydantic import BaseModel, Field, field_validator, model_validator
@@ -10,7 +10,7 @@ import ffmpeg
 from dataclasses import dataclass, field
 from PIL import Image
 
-from src.tools.video_utils import extract_video_metadata, validate_video_file
+from src.tools.video_utils import validate_video_file
 
 
 class VideoMetadata(BaseModel):
@@ -42,8 +42,7 @@ class VideoMetadata(BaseModel):
     @classmethod
     def from_file(cls, file_path: str) -> 'VideoMetadata':
         """Create VideoMetadata by extracting information from a video file."""
-        validate_video_file(file_path)
-        metadata = extract_video_metadata(file_path)
+        metadata = validate_video_file(file_path)
         
         return cls(
             file_path=file_path,
@@ -217,19 +216,29 @@ class WorkflowState:
     api_key: str # Added API Key to state
     frames_dir: Optional[str] = None
     frame_paths: List[str] = field(default_factory=list)
+    frame_count: int = 0 # Number of frames sampled from the video, from its probed duration
     frame_analysis: List[dict] = field(default_factory=list) # Analysis per frame
     analysis_summary: Optional[str] = None
+    video_metadata: Dict[str, Any] = field(default_factory=dict) # Probe result from extract_video_metadata
     moments: List[VideoMoment] = field(default_factory=list) # Initially identified moments
     selected_moments: List[SelectedMoment] = field(default_factory=list) # Moments selected for content creation
     platform_content: Dict[str, List[PlatformContent]] = field(default_factory=lambda: {p: [] for p in SUPPORTED_PLATFORMS}) # Content formatted per platform
+    pending_platforms: Set[str] = field(default_factory=set) # Platforms whose routed content still awaits formatting
     report_path: Optional[str] = None
     error: Optional[str] = None
     current_stage: Optional[str] = None # Name of the current stage running
     stages_completed: List[str] = field(default_factory=list) # Names of stages completed
+    stages_completed_set: Set[str] = field(default_factory=set, repr=False) # Set mirror of stages_completed for O(1) membership tests
     checkpoint_data: Dict[str, Any] = field(default_factory=dict) # Data to save/load from checkpoint
     processing_requests: list[ProcessingRequest] = field(default_factory=list)
     processing_results: list[ProcessingResult] = field(default_factory=list)
 
+    def mark_stage_completed(self, stage: str) -> None:
+        """Records a completed stage once, keeping stages_completed and its set mirror in sync."""
+        if stage not in self.stages_completed_set:
+            self.stages_completed_set.add(stage)
+            self.stages_completed.append(stage)
+
     def update_checkpoint(self):
         """Prepares data for checkpointing."""
         # Exclude non-serializable or large data if necessary
@@ -243,6 +252,7 @@ class WorkflowState:
             "selected_moments": [sm.__dict__ for sm in self.selected_moments],
             # Use __dict__ for now, assuming nested dataclasses are serializable enough for checkpoint
             "platform_content": {p: [pc.__dict__ for pc in pcs] for p, pcs in self.platform_content.items()},
+            "pending_platforms": sorted(self.pending_platforms),
             "report_path": self.report_path,
             "current_stage": self.current_stage,
             "stages_completed": self.stages_completed,
@@ -282,10 +292,12 @@ class WorkflowState:
                          print(f"Warning: Skipping platform content reconstruction due to missing data: {content_data}")
                          
         state.platform_content = platform_content
+        state.pending_platforms = set(data.get("pending_platforms", []))
 
         state.report_path = data.get("report_path")
         state.current_stage = data.get("current_stage")
         state.stages_completed = data.get("stages_completed", [])
+        state.stages_completed_set = set(state.stages_completed)
         # Reconstruct processing requests/results
         state.processing_requests = [ProcessingRequest(**req) for req in data.get("processing_requests", [])]
         state.processing_results = [ProcessingResult(**res) for res in data.get("processing_results", [])]
@@ -8,7 +8,6 @@ import sys
 import logging
 import time
 from pathlib import Path
-import json
 
 # Add the project root to the Python path
 project_root = Path(__file__).resolve().parent.parent
@@ -27,11 +26,10 @@ CHECKPOINT_DIR = "./checkpoints"
 
 def display_checkpoint_status(checkpoint_mgr):
     """Display the current status of the checkpoint from the actual file."""
-    # Get the raw data from the checkpoint file to ensure we're seeing the latest state
+    # Reload the snapshot and journal from disk to ensure we're seeing the latest persisted state
     checkpoint_path = checkpoint_mgr.checkpoint_path
     try:
-        with open(checkpoint_path, 'r') as f:
-            data = json.load(f)
+        data = CheckpointManager(checkpoint_mgr.checkpoint_dir, video_path=checkpoint_mgr.video_path).data
             
         # Get stage names for more readable output
         stage_names = data.get("stage_names", {})
@@ -53,7 +51,7 @@ def display_checkpoint_status(checkpoint_mgr):
         print(f"  Stages completed: {', '.join(completed_stages) if completed_stages else 'None'}")
         print(f"  Last updated: {data['metadata']['last_updated']}")
         
-    except (json.JSONDecodeError, IOError, KeyError) as e:
+    except (ValueError, IOError, KeyError) as e:
         print(f"  Error reading checkpoint: {e}")
 
 def test_part1():
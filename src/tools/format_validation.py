@@ -5,6 +5,7 @@ import ffmpeg
 from typing import Optional
 
 from src.models.state import PlatformContent
+from src.tools.video_utils import extract_thumbnail_image
 
 def validate_format_specs(content: PlatformContent) -> bool:
     """Placeholder function to validate FFmpeg parameters."""
@@ -73,18 +74,7 @@ def generate_preview_thumbnail(
     # A full solution might involve actually running ffmpeg.
     try:
         # Extract the raw frame first without transformations
-        out_bytes, err_bytes = (
-            ffmpeg
-            .input(video_path, ss=timestamp)
-            .output('pipe:', vframes=1, format='image2', vcodec='mjpeg')
-            .run(capture_stdout=True, capture_stderr=True)
-        )
-        if not out_bytes:
-            print(f"FFmpeg Error extracting frame: {err_bytes.decode()}")
-            return None
-        
-        from io import BytesIO
-        img = Image.open(BytesIO(out_bytes))
+        img = extract_thumbnail_image(video_path, timestamp, accurate=True)
         original_width, original_height = img.size
         
         # --- Apply Approximate Transformations --- 
@@ -1,138 +1,290 @@
 """Client for interacting with Google's Gemini API for video content analysis."""
 
 import os
-import json
+import re
+import time
+import logging
 import tempfile
 from typing import List, Dict, Any, Optional, Union
 from pathlib import Path
 
-import google.generativeai as genai
-from PIL import Image
+# orjson parses faster than the stdlib; fall back to json when it isn't installed
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
 
 from src.models.state import VideoMoment
-from src.tools.video_utils import get_video_duration_and_dimensions, validate_video_file
+from src.tools.video_utils import validate_video_file, extract_video_metadata, compute_video_fingerprint
+from src.tools.response_cache import DiskCache, SemanticCache, file_sha256
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = 'gemini-1.5-pro'
+INLINE_UPLOAD_LIMIT = 20 * 1024 * 1024  # 20 MB; larger videos go through the File API
+UPLOAD_RETRIES = 3
+FILE_POLL_INTERVAL = 2  # seconds between File API processing-state checks
+PROMPT_VERSION = "3"
+TEMPERATURE = 0.2
+MAX_OUTPUT_TOKENS = 512  # 2-4 moments at ~100 tokens each
+
+# Constrains Gemini's JSON mode to the moment list the parser expects
+MOMENTS_RESPONSE_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "start_time": {"type": "NUMBER"},
+            "end_time": {"type": "NUMBER"},
+            "description": {"type": "STRING"},
+        },
+        "required": ["start_time", "end_time", "description"],
+    },
+}
+
+# Matches a fenced ```json block or, failing that, a bare JSON array
+_JSON_BLOCK_RE = re.compile(r"```(?:json)?\s*(\[.*\])\s*```|(\[.*\])", re.S)
+
+_EXT_TO_MIME = {
+    ".mp4": "video/mp4",
+    ".mov": "video/quicktime",
+    ".avi": "video/x-msvideo",
+    ".webm": "video/webm",
+    ".mpeg": "video/mpeg",
+    ".mpg": "video/mpeg",
+}
+
+# Static instructions sent first so the prompt prefix is byte-identical across calls
+# and can be reused by provider-side prefix caching. Per-video details are sent after it.
+ANALYSIS_PROMPT_PREFIX = """
+Analyze this video content and identify 2-4 interesting moments or segments in it.
+
+For each interesting moment, provide:
+1. A start time (in seconds)
+2. An end time (in seconds)
+3. A brief description of what makes this moment interesting
+
+Return your response in this JSON format:
+[
+    {"start_time": 45, "end_time": 60, "description": "Speaker explains key concept with animated example"},
+    {"start_time": 180, "end_time": 195, "description": "Live code demonstration of the feature"}
+]
+
+Only return the JSON array, nothing else.
+"""
 
 
 class GeminiClient:
     """Client for interacting with Google's Gemini API for video content analysis."""
     
-    def __init__(self, api_key: str):
+    _genai = None  # google.generativeai module, set on first instantiation
+    
+    def __init__(self, 
+                 api_key: str, 
+                 cache: Optional[DiskCache] = None, 
+                 semantic_cache: Optional[SemanticCache] = None,
+                 use_cache: bool = True,
+                 inline_upload_limit: int = INLINE_UPLOAD_LIMIT):
         """
         Initialize the Gemini API client.
         
         Args:
             api_key: Google API key with access to Gemini models
+            cache: Optional exact-match response cache (a default DiskCache is created if not provided)
+            semantic_cache: Optional near-duplicate cache; disabled when not provided, since a
+                different video with similar frames can match
+            use_cache: Whether to reuse cached analysis results for identical or near-identical videos
+            inline_upload_limit: Videos larger than this many bytes are uploaded via the File API
         """
+        # Imported lazily: the SDK is heavy and not needed unless a client is created
+        import google.generativeai as genai
+        GeminiClient._genai = genai
+        
         genai.configure(api_key=api_key)
         # Use gemini-1.5-pro for video processing (supports video input natively)
-        self.model = genai.GenerativeModel('gemini-1.5-pro')
+        self.model = genai.GenerativeModel(MODEL_NAME)
+        self.cache = (cache or DiskCache()) if use_cache else None
+        self.semantic_cache = semantic_cache if use_cache else None
+        self.inline_upload_limit = inline_upload_limit
     
-    def analyze_video(self, video_path: str) -> List[VideoMoment]:
+    def _upload_file(self, video_path: str, mime_type: str):
         """
-        Analyze a video using Gemini's native video processing capabilities.
+        Upload a video through the resumable File API, retrying with exponential backoff.
         
         Args:
             video_path: Path to the video file
+            mime_type: MIME type of the video
             
         Returns:
-            List of VideoMoment objects representing interesting moments
+            The uploaded file, once Gemini has finished processing it
         """
-        try:
-            # Validate the video file exists and is readable
-            validate_video_file(video_path)
-            
-            # Get video duration to use in prompt
-            duration, _ = get_video_duration_and_dimensions(video_path)
-            
-            # Prepare the file for Gemini API
-            with open(video_path, 'rb') as f:
-                video_data = f.read()
-            
-            mime_type = "video/mp4"  # Default mime type
-            # Determine the correct MIME type based on file extension
-            if video_path.lower().endswith('.mp4'):
-                mime_type = "video/mp4"
-            elif video_path.lower().endswith('.mov'):
-                mime_type = "video/mov"
-            elif video_path.lower().endswith('.avi'):
-                mime_type = "video/avi"
-            elif video_path.lower().endswith('.webm'):
-                mime_type = "video/webm"
-            elif video_path.lower().endswith('.mpeg') or video_path.lower().endswith('.mpg'):
-                mime_type = "video/mpeg"
-                
-            # Prepare the prompt for Gemini
-            prompt = f"""
-            Analyze this video content with duration of {int(duration)} seconds.
-            Identify 2-4 interesting moments or segments in the video.
+        for attempt in range(UPLOAD_RETRIES):
+            try:
+                video_file = self._genai.upload_file(path=video_path, mime_type=mime_type)
+                break
+            except Exception:
+                if attempt == UPLOAD_RETRIES - 1:
+                    raise
+                time.sleep(2 ** attempt)
+        
+        # Videos must finish server-side processing before they can be used in a prompt
+        while video_file.state.name == "PROCESSING":
+            time.sleep(FILE_POLL_INTERVAL)
+            video_file = self._genai.get_file(video_file.name)
+        
+        if video_file.state.name == "FAILED":
+            raise ValueError(f"Gemini failed to process uploaded video: {video_path}")
+        
+        return video_file
+    
+    def _video_part(self, video_path: str) -> Any:
+        """
+        Build the content part for a video: inline bytes for small files, a File API upload otherwise.
+        
+        Peak memory is capped at inline_upload_limit; set it to 0 to always stream through the File API.
+        
+        Args:
+            video_path: Path to the video file
             
-            For each interesting moment, provide:
-            1. A start time (in seconds)
-            2. An end time (in seconds)
-            3. A brief description of what makes this moment interesting
+        Returns:
+            A content part accepted by generate_content
+        """
+        # Determine the correct MIME type based on file extension
+        mime_type = _EXT_TO_MIME.get(Path(video_path).suffix.lower(), "video/mp4")
+        
+        if os.path.getsize(video_path) > self.inline_upload_limit:
+            return self._upload_file(video_path, mime_type)
+        
+        # Inline parts are serialized into a protobuf Blob, which needs the payload as bytes,
+        # so the read is bounded by inline_upload_limit rather than streamed
+        with open(video_path, 'rb') as f:
+            video_data = f.read()
+        return {"inline_data": {"mime_type": mime_type, "data": video_data}}
+    
+    def _generate(self, parts: List[Dict[str, Any]]) -> str:
+        """
+        Send the static analysis prompt followed by the given content parts.
+        
+        Args:
+            parts: Per-request content parts (video blob, duration, URL, ...)
             
-            Return your response in this JSON format:
-            [
-                {{"start_time": 45, "end_time": 60, "description": "Speaker explains key concept with animated example"}},
-                {{"start_time": 180, "end_time": 195, "description": "Live code demonstration of the feature"}}
-            ]
+        Returns:
+            Raw response text from Gemini
+        """
+        # Use a low temperature for more predictable results and schema-constrained JSON output
+        generation_config = {
+            "temperature": TEMPERATURE,
+            "top_p": 0.8,
+            "response_mime_type": "application/json",
+            "response_schema": MOMENTS_RESPONSE_SCHEMA,
+            "max_output_tokens": MAX_OUTPUT_TOKENS
+        }
+        
+        response = self.model.generate_content(
+            [{"text": ANALYSIS_PROMPT_PREFIX}, *parts],
+            generation_config=generation_config
+        )
+        return response.text
+    
+    def _parse_moments(self, response_text: str) -> List[VideoMoment]:
+        """
+        Parse a Gemini response into VideoMoment objects.
+        
+        Args:
+            response_text: Raw response text, optionally wrapped in markdown code fences
             
-            Only return the JSON array, nothing else.
-            """
+        Returns:
+            List of VideoMoment objects (empty if the response is not valid JSON)
+        """
+        try:
+            # JSON mode returns the bare array
+            moments_data = _json.loads(response_text)
+        except ValueError:  # JSONDecodeError from either json or orjson
+            # Fall back to extracting the array from markdown code fences or surrounding text
+            match = _JSON_BLOCK_RE.search(response_text)
+            response_text = (match.group(1) or match.group(2)).strip() if match else response_text.strip()
+            try:
+                moments_data = _json.loads(response_text)
+            except ValueError:
+                logger.warning("Failed to parse Gemini response as JSON: %s", response_text)
+                return []
+        
+        # Convert to VideoMoment objects
+        moments = []
+        for moment_data in moments_data:
+            # Validate required fields
+            if all(k in moment_data for k in ["start_time", "end_time", "description"]):
+                moment = VideoMoment(
+                    start_time=float(moment_data["start_time"]),
+                    end_time=float(moment_data["end_time"]),
+                    description=moment_data["description"],
+                    engagement_score=0.5  # Default score
+                )
+                moments.append(moment)
+        
+        return moments
+    
+    def analyze_video(self, video_path: str, *, validate: bool = True) -> List[VideoMoment]:
+        """
+        Analyze a video using Gemini's native video processing capabilities.
+        
+        Args:
+            video_path: Path to the video file
+            validate: Whether to check the file locally before uploading. Trusted
+                pipelines can disable it; invalid files are then reported by Gemini instead.
             
-            # Create the content parts
-            # First part is the video data as a blob
-            video_part = {"mime_type": mime_type, "data": video_data}
+        Returns:
+            List of VideoMoment objects representing interesting moments
+        """
+        try:
+            # Return cached moments if this exact video was already analyzed
+            cache_key = None
+            if self.cache is not None:
+                cache_key = DiskCache.make_key(MODEL_NAME, PROMPT_VERSION, TEMPERATURE, file_sha256(video_path))
+                cached_moments = self.cache.get(cache_key)
+                if cached_moments is not None:
+                    return [VideoMoment(**m) for m in cached_moments]
             
-            # Create the generation config - using a temperature of 0.2 for more predictable results
-            generation_config = {
-                "temperature": 0.2,
-                "top_p": 0.8,
-                "response_mime_type": "text/plain"
-            }
+            # Validate the video file exists and is readable, reusing the probe for the duration
+            if validate:
+                metadata = validate_video_file(video_path)
+            else:
+                metadata = extract_video_metadata(video_path)
+            duration = metadata['duration']
             
-            # Call Gemini API with the video - fixed format with proper role specification
-            response = self.model.generate_content(
-                [
-                    {"text": prompt},
-                    {"inline_data": video_part}
-                ],
-                generation_config=generation_config
-            )
+            # Fall back to near-duplicate lookup (re-encodes, resized copies). The duration is
+            # part of the namespace, so a trimmed copy never gets moments with shifted timestamps
+            fingerprint = None
+            cache_namespace = f"{MODEL_NAME}:{PROMPT_VERSION}:{TEMPERATURE}:{round(duration)}"
+            if self.semantic_cache is not None:
+                try:
+                    fingerprint = compute_video_fingerprint(video_path, duration)
+                except Exception:
+                    # The cache is only an optimization; analyze the video as usual
+                    logger.warning("Could not fingerprint %s, skipping the semantic cache", video_path, exc_info=True)
+                if fingerprint is not None:
+                    cached_moments = self.semantic_cache.get(cache_namespace, fingerprint)
+                    if cached_moments is not None:
+                        if cache_key is not None:
+                            self.cache.set(cache_key, cached_moments)
+                        return [VideoMoment(**m) for m in cached_moments]
             
-            # Parse the response text as JSON
-            response_text = response.text
+            moments = self._parse_moments(self._generate([
+                {"text": f"Video duration: {int(duration)} seconds."},
+                self._video_part(video_path)
+            ]))
             
-            # Clean the response if it contains markdown code blocks
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0].strip()
+            if moments:
+                moment_dicts = [m.model_dump() for m in moments]
+                if cache_key is not None:
+                    self.cache.set(cache_key, moment_dicts)
+                if fingerprint is not None:
+                    self.semantic_cache.set(cache_namespace, fingerprint, moment_dicts)
             
-            try:
-                moments_data = json.loads(response_text)
+            return moments
                 
-                # Convert to VideoMoment objects
-                moments = []
-                for moment_data in moments_data:
-                    # Validate required fields
-                    if all(k in moment_data for k in ["start_time", "end_time", "description"]):
-                        moment = VideoMoment(
-                            start_time=float(moment_data["start_time"]),
-                            end_time=float(moment_data["end_time"]),
-                            description=moment_data["description"],
-                            engagement_score=0.5  # Default score
-                        )
-                        moments.append(moment)
-                
-                return moments
-                
-            except json.JSONDecodeError:
-                print(f"Failed to parse Gemini response as JSON: {response_text}")
-                return []
-                
-        except Exception as e:
-            print(f"Error analyzing video: {str(e)}")
+        except Exception:
+            logger.exception("Error analyzing video %s", video_path)
             return []
             
     def analyze_youtube_video(self, youtube_url: str) -> List[VideoMoment]:
@@ -146,70 +298,9 @@ class GeminiClient:
             List of VideoMoment objects representing interesting moments
         """
         try:
-            # Prepare the prompt for Gemini
-            prompt = f"""
-            Analyze this YouTube video: {youtube_url}
-            
-            Identify 2-4 interesting moments or segments in the video.
-            
-            For each interesting moment, provide:
-            1. A start time (in seconds)
-            2. An end time (in seconds)
-            3. A brief description of what makes this moment interesting
-            
-            Return your response in this JSON format:
-            [
-                {{"start_time": 45, "end_time": 60, "description": "Speaker explains key concept with animated example"}},
-                {{"start_time": 180, "end_time": 195, "description": "Live code demonstration of the feature"}}
-            ]
-            
-            Only return the JSON array, nothing else.
-            """
-            
-            # Create the generation config
-            generation_config = {
-                "temperature": 0.2,
-                "top_p": 0.8,
-                "response_mime_type": "text/plain"
-            }
-            
-            # Call Gemini API with the YouTube URL
-            response = self.model.generate_content(
-                {"text": prompt},
-                generation_config=generation_config
-            )
-            
-            # Parse the response text as JSON
-            response_text = response.text
-            
-            # Clean the response if it contains markdown code blocks
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0].strip()
-            
-            try:
-                moments_data = json.loads(response_text)
-                
-                # Convert to VideoMoment objects
-                moments = []
-                for moment_data in moments_data:
-                    # Validate required fields
-                    if all(k in moment_data for k in ["start_time", "end_time", "description"]):
-                        moment = VideoMoment(
-                            start_time=float(moment_data["start_time"]),
-                            end_time=float(moment_data["end_time"]),
-                            description=moment_data["description"],
-                            engagement_score=0.5  # Default score
-                        )
-                        moments.append(moment)
-                
-                return moments
-                
-            except json.JSONDecodeError:
-                print(f"Failed to parse Gemini response as JSON: {response_text}")
-                return []
-                
-        except Exception as e:
-            print(f"Error analyzing YouTube video: {str(e)}")
-            return [] 
\ No newline at end of file
+            return self._parse_moments(self._generate([
+                {"text": f"Analyze this YouTube video: {youtube_url}"}
+            ]))
+        except Exception:
+            logger.exception("Error analyzing YouTube video %s", youtube_url)
+            return []
@@ -0,0 +1,220 @@
+"""SQLite-backed cache for Gemini video analysis responses."""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = "./cache/gemini_responses.sqlite"
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60  # 7 days
+DEFAULT_SIMILARITY_THRESHOLD = 0.92
+HASH_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+
+def file_sha256(file_path: str) -> str:
+    """
+    Compute the SHA-256 of a file without loading it fully into memory.
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """Exact-match cache of analysis results keyed by content hash and model settings."""
+
+    def __init__(self, cache_path: str = DEFAULT_CACHE_PATH, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        """
+        Initialize the cache, creating the SQLite table if needed.
+
+        Args:
+            cache_path: Path to the SQLite database file
+            ttl_seconds: Maximum age of a cache entry before it is ignored
+        """
+        self.cache_path = Path(cache_path)
+        self.ttl_seconds = ttl_seconds
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(str(self.cache_path))
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key BLOB PRIMARY KEY, moments_json TEXT, created_at INT)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, prompt_version: str, temperature: float, content_hash: str) -> bytes:
+        """Build the cache key for a given model, prompt version, temperature and content hash."""
+        return hashlib.sha256(f"{model}:{prompt_version}:{temperature}:{content_hash}".encode()).digest()
+
+    def get(self, key: bytes) -> Optional[List[Any]]:
+        """
+        Look up cached moments.
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            The cached list of moment dicts, or None on a miss or expired entry
+        """
+        row = self._conn.execute(
+            "SELECT moments_json, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        moments_json, created_at = row
+        if int(time.time()) - created_at > self.ttl_seconds:
+            return None
+
+        try:
+            return json.loads(moments_json)
+        except json.JSONDecodeError:
+            logger.warning("Discarding corrupt cache entry")
+            return None
+
+    def set(self, key: bytes, moments: List[Any]) -> None:
+        """
+        Store moments under the given key.
+
+        Args:
+            key: Cache key from make_key
+            moments: JSON-serializable list of moment dicts
+        """
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (key, moments_json, created_at) VALUES (?, ?, ?)",
+            (key, json.dumps(moments), int(time.time()))
+        )
+        self._conn.commit()
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for a cache."""
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class SemanticCache:
+    """Nearest-neighbor cache of analysis results keyed by video fingerprint vectors.
+
+    Sits behind DiskCache: it catches near-duplicate videos (re-encodes, resized
+    copies) whose bytes differ but whose content is the same.
+    """
+
+    def __init__(self,
+                 cache_path: str = DEFAULT_CACHE_PATH,
+                 threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+                 ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        """
+        Initialize the cache and load stored fingerprints into memory.
+
+        Args:
+            cache_path: Path to the SQLite database file
+            threshold: Minimum cosine similarity for a lookup to count as a hit
+            ttl_seconds: Maximum age of a cache entry before it is ignored
+        """
+        self.cache_path = Path(cache_path)
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(str(self.cache_path))
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            "id INTEGER PRIMARY KEY, namespace TEXT, vector BLOB, moments_json TEXT, created_at INT)"
+        )
+        self._conn.commit()
+
+        min_created_at = int(time.time()) - self.ttl_seconds
+        rows = self._conn.execute(
+            "SELECT namespace, vector, moments_json FROM fingerprints WHERE created_at >= ?",
+            (min_created_at,)
+        ).fetchall()
+        self._moments_json = [row[2] for row in rows]
+        self._vectors = [np.frombuffer(row[1], dtype=np.float32) for row in rows]
+        # Entry indices per (namespace, vector length), plus their vectors stacked into a
+        # matrix so a lookup is a single matrix-vector product instead of a Python loop
+        self._rows: Dict[Tuple[str, int], List[int]] = {}
+        self._matrices: Dict[Tuple[str, int], np.ndarray] = {}
+        for idx, (namespace, _, _) in enumerate(rows):
+            self._rows.setdefault((namespace, self._vectors[idx].shape[0]), []).append(idx)
+
+    def get(self, namespace: str, vector: np.ndarray) -> Optional[List[Any]]:
+        """
+        Find cached moments for the most similar stored fingerprint.
+
+        Args:
+            namespace: Model/prompt identifier; only entries with the same namespace match
+            vector: L2-normalized fingerprint of the video
+
+        Returns:
+            The cached list of moment dicts, or None if no entry is similar enough
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+        key = (namespace, vector.shape[0]) if vector.ndim == 1 else None
+        rows = self._rows.get(key)
+        if not rows:
+            self.stats.misses += 1
+            return None
+
+        matrix = self._matrices.get(key)
+        if matrix is None:
+            matrix = self._matrices[key] = np.stack([self._vectors[idx] for idx in rows])
+        scores = matrix @ vector
+        # Prefer the most recently stored entry among equal scores
+        best = len(scores) - 1 - int(np.argmax(scores[::-1]))
+        best_idx, best_score = rows[best], float(scores[best])
+
+        if best_score < self.threshold:
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        logger.info("Semantic cache hit (similarity %.3f)", best_score)
+        return json.loads(self._moments_json[best_idx])
+
+    def set(self, namespace: str, vector: np.ndarray, moments: List[Any]) -> None:
+        """
+        Store moments under a fingerprint vector.
+
+        Args:
+            namespace: Model/prompt identifier
+            vector: L2-normalized fingerprint of the video
+            moments: JSON-serializable list of moment dicts
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+        moments_json = json.dumps(moments)
+        self._conn.execute(
+            "INSERT INTO fingerprints (namespace, vector, moments_json, created_at) VALUES (?, ?, ?, ?)",
+            (namespace, vector.tobytes(), moments_json, int(time.time()))
+        )
+        self._conn.commit()
+
+        key = (namespace, vector.shape[0])
+        self._rows.setdefault(key, []).append(len(self._vectors))
+        self._matrices.pop(key, None) # Restacked on the next lookup
+        self._vectors.append(vector)
+        self._moments_json.append(moments_json)
@@ -2,17 +2,26 @@
 
 # This file will contain video processing utilities using ffmpeg-python 
 
+import io
 import os
+import stat
 import json
+import functools
 from typing import Dict, Tuple, Any, Optional
 from datetime import datetime
 from pathlib import Path
 
 import ffmpeg
-from PIL import Image
+import numpy as np
 
+# PyAV reads container headers in-process; fall back to the ffprobe subprocess without it
+try:
+    import av
+except ImportError:
+    av = None
 
-def validate_video_file(file_path: str) -> bool:
+
+def validate_video_file(file_path: str) -> Dict[str, Any]:
     """
     Validate that a video file exists, is readable, and has a supported format.
     
@@ -20,44 +29,72 @@ def validate_video_file(file_path: str) -> bool:
         file_path: Path to the video file
         
     Returns:
-        True if the file is valid
+        The video metadata (truthy), so callers can reuse the probe result
         
     Raises:
         ValueError: If the file is invalid or cannot be processed
     """
-    if not os.path.exists(file_path):
+    # A single stat covers both the existence and the regular-file checks
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
         raise ValueError(f"File does not exist: {file_path}")
     
-    if not os.path.isfile(file_path):
+    if not stat.S_ISREG(st.st_mode):
         raise ValueError(f"Path is not a file: {file_path}")
     
     # Check if the file is readable
-    if not os.access(file_path, os.R_OK):
+    try:
+        open(file_path, 'rb').close()
+    except OSError:
         raise ValueError(f"File is not readable: {file_path}")
     
-    # Check if the format is supported by ffmpeg
+    # Check if the format is supported and has a video stream
+    return extract_video_metadata(file_path, st)
+
+
+def _parse_creation_time(creation_time_str: str) -> Optional[datetime]:
+    """Parse an ffmpeg creation_time tag (YYYY-MM-DDThh:mm:ss.fffffffZ)."""
     try:
-        probe = ffmpeg.probe(file_path)
-        # If we can probe it, ffmpeg recognizes the format
-        # Check if it has a video stream
-        if not any(stream['codec_type'] == 'video' for stream in probe['streams']):
-            raise ValueError(f"File does not contain a video stream: {file_path}")
-    except ffmpeg.Error as e:
-        raise ValueError(f"Invalid video format or corrupted file: {e.stderr}")
-    
-    return True
+        return datetime.fromisoformat(creation_time_str.replace('Z', '+00:00'))
+    except ValueError:
+        # If we can't parse it, skip
+        return None
 
 
-def extract_video_metadata(file_path: str) -> Dict[str, Any]:
-    """
-    Extract metadata from a video file using FFmpeg.
-    
-    Args:
-        file_path: Path to the video file
+def _parse_frame_rate(rate: str) -> float:
+    """Convert an ffprobe "num/den" frame rate to frames per second (0.0 if undefined)."""
+    num, _, den = rate.partition('/')
+    return float(num) / float(den) if den and float(den) != 0 else 0.0
+
+
+def _extract_metadata_av(file_path: str) -> Dict[str, Any]:
+    """Extract metadata in-process with PyAV (libavformat), reading only container headers."""
+    with av.open(file_path) as container:
+        video_stream = next((s for s in container.streams if s.type == 'video'), None)
+        if video_stream is None:
+            raise ValueError(f"No video stream found in file: {file_path}")
         
-    Returns:
-        Dictionary containing video metadata
-    """
+        metadata = {
+            'duration': container.duration / av.time_base if container.duration else 0.0,
+            'dimensions': (
+                int(video_stream.codec_context.width or 0),
+                int(video_stream.codec_context.height or 0)
+            ),
+            'framerate': float(video_stream.average_rate or 0),
+        }
+        
+        creation_time_str = container.metadata.get('creation_time')
+        if creation_time_str:
+            creation_date = _parse_creation_time(creation_time_str)
+            if creation_date is not None:
+                metadata['creation_date'] = creation_date
+        
+        return metadata
+
+
+def _extract_metadata_ffprobe(file_path: str) -> Dict[str, Any]:
+    """Extract metadata by running ffprobe in a subprocess."""
     try:
         probe = ffmpeg.probe(file_path)
         
@@ -75,34 +112,102 @@ def extract_video_metadata(file_path: str) -> Dict[str, Any]:
                 int(video_stream.get('width', 0)), 
                 int(video_stream.get('height', 0))
             ),
+            'framerate': _parse_frame_rate(video_stream.get('r_frame_rate', '0/1')),
         }
         
         # Try to get creation date
         if 'tags' in probe.get('format', {}) and 'creation_time' in probe['format']['tags']:
-            creation_time_str = probe['format']['tags']['creation_time']
-            try:
-                # Standard format is YYYY-MM-DDThh:mm:ss.fffffffZ
-                metadata['creation_date'] = datetime.fromisoformat(
-                    creation_time_str.replace('Z', '+00:00')
-                )
-            except ValueError:
-                # If we can't parse it, skip
-                pass
+            creation_date = _parse_creation_time(probe['format']['tags']['creation_time'])
+            if creation_date is not None:
+                metadata['creation_date'] = creation_date
                 
         return metadata
         
     except ffmpeg.Error as e:
-        raise ValueError(f"Failed to extract metadata: {e.stderr}")
+        raise ValueError(f"Invalid video format or corrupted file: {e.stderr}")
+
+
+@functools.lru_cache(maxsize=256)
+def _extract_metadata_cached(abs_path: str, mtime_ns: int, size: int) -> Dict[str, Any]:
+    """Probe a file once per (path, mtime, size); a changed file gets a new cache key."""
+    if av is not None:
+        try:
+            return _extract_metadata_av(abs_path)
+        except av.error.FFmpegError:
+            pass
+    
+    return _extract_metadata_ffprobe(abs_path)
+
+
+def extract_video_metadata(file_path: str, st: Optional[os.stat_result] = None) -> Dict[str, Any]:
+    """
+    Extract metadata from a video file.
+    
+    Uses PyAV when installed and falls back to ffprobe for containers
+    libavformat cannot open in-process. Results are memoized per
+    (path, mtime, size), so repeated calls on an unchanged file do not re-probe.
+    
+    Args:
+        file_path: Path to the video file
+        st: Result of os.stat(file_path), if the caller already has it
+        
+    Returns:
+        Dictionary containing video metadata (duration, dimensions, framerate,
+        size and, when tagged, creation_date)
+        
+    Raises:
+        ValueError: If the file cannot be probed or has no video stream
+    """
+    if st is None:
+        st = os.stat(file_path)
+    metadata = _extract_metadata_cached(os.path.abspath(file_path), st.st_mtime_ns, st.st_size)
+    # Return a copy so callers cannot mutate the cached entry
+    return dict(metadata, size=st.st_size)
 
 
-def extract_thumbnail(video_path: str, timestamp: float, output_path: Optional[str] = None) -> str:
+def _thumbnail_output(video_path: str, timestamp: float, output_path: str, accurate: bool):
+    """
+    Build the ffmpeg graph that writes a single JPEG frame at timestamp
+    to output_path (a file path or 'pipe:' for stdout).
+    
+    Seeks on the input side and skips audio/subtitle streams. Unless accurate
+    is set, the seek lands on the nearest keyframe instead of decoding up to
+    the exact timestamp.
+    """
+    input_args = {'ss': timestamp}
+    if not accurate:
+        input_args['noaccurate_seek'] = None
+    
+    return (
+        ffmpeg
+        .input(video_path, **input_args)
+        .output(
+            output_path,
+            vframes=1,
+            an=None,  # Don't demux/decode audio
+            sn=None,  # Don't demux subtitles
+            format='image2',
+            vcodec='mjpeg',
+            pix_fmt='yuvj420p',  # Use full-range YUV pixel format
+            strict='unofficial',  # Set compliance level to unofficial
+            **{'q:v': 3}
+        )
+    )
+
+
+def extract_thumbnail(video_path: str, timestamp: float, output_path: Optional[str] = None, 
+                      accurate: bool = False) -> str:
     """
     Extract a thumbnail from a video at the specified timestamp.
     
+    By default the frame comes from the nearest keyframe, which may be up to
+    one GOP away from timestamp. Pass accurate=True for the exact frame.
+    
     Args:
         video_path: Path to the video file
         timestamp: Time in seconds at which to extract the thumbnail
         output_path: Path where to save the thumbnail. If None, a path will be generated.
+        accurate: Whether to decode up to the exact timestamp instead of the nearest keyframe
         
     Returns:
         Path to the saved thumbnail
@@ -113,28 +218,57 @@ def extract_thumbnail(video_path: str, timestamp: float, output_path: Optional[s
         output_dir = os.path.dirname(video_path)
         output_path = os.path.join(output_dir, f"{base_name}_thumbnail_{int(timestamp)}s.jpg")
     
-    try:
-        # Make sure the output directory exists
-        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    # Make sure the output directory exists
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    
+    # Extract before opening the file, so a failed extraction leaves no empty thumbnail behind
+    data = extract_thumbnail_bytes(video_path, timestamp, accurate)
+    with open(output_path, 'wb') as f:
+        f.write(data)
+    
+    return output_path
+
+
+def extract_thumbnail_bytes(video_path: str, timestamp: float, accurate: bool = False) -> bytes:
+    """
+    Extract a thumbnail as in-memory JPEG bytes, without touching the disk.
+    
+    Args:
+        video_path: Path to the video file
+        timestamp: Time in seconds at which to extract the thumbnail
+        accurate: Whether to decode up to the exact timestamp instead of the nearest keyframe
         
-        # Extract the frame with corrected encoding parameters
-        (
-            ffmpeg
-            .input(video_path, ss=timestamp)
-            .output(
-                output_path, 
-                vframes=1,
-                pix_fmt='yuvj420p',  # Use full-range YUV pixel format
-                strict='unofficial'   # Set compliance level to unofficial
-            )
-            .overwrite_output()
+    Returns:
+        JPEG-encoded frame
+    """
+    try:
+        out, _ = (
+            _thumbnail_output(video_path, timestamp, 'pipe:', accurate)
             .run(capture_stdout=True, capture_stderr=True)
         )
-        
-        return output_path
-    
     except ffmpeg.Error as e:
         raise ValueError(f"Failed to extract thumbnail: {e.stderr.decode('utf-8')}")
+    
+    if not out:
+        raise ValueError(f"Failed to extract thumbnail: no frame at {timestamp}s in {video_path}")
+    return out
+
+
+def extract_thumbnail_image(video_path: str, timestamp: float, accurate: bool = False) -> "Image.Image":
+    """
+    Extract a thumbnail as a PIL image, without touching the disk.
+    
+    Args:
+        video_path: Path to the video file
+        timestamp: Time in seconds at which to extract the thumbnail
+        accurate: Whether to decode up to the exact timestamp instead of the nearest keyframe
+        
+    Returns:
+        The decoded frame
+    """
+    from PIL import Image
+    
+    return Image.open(io.BytesIO(extract_thumbnail_bytes(video_path, timestamp, accurate)))
 
 
 def get_video_duration_and_dimensions(file_path: str) -> Tuple[float, Tuple[int, int]]:
@@ -148,4 +282,43 @@ def get_video_duration_and_dimensions(file_path: str) -> Tuple[float, Tuple[int,
         Tuple of (duration in seconds, (width, height))
     """
     metadata = extract_video_metadata(file_path)
-    return metadata['duration'], metadata['dimensions'] 
\ No newline at end of file
+    return metadata['duration'], metadata['dimensions']
+
+
+def compute_video_fingerprint(file_path: str, duration: float, num_frames: int = 16, size: int = 8) -> np.ndarray:
+    """
+    Compute a coarse visual fingerprint of a video for near-duplicate detection.
+    
+    Samples num_frames evenly spaced frames, downscales each to a size x size
+    grayscale thumbnail and returns the mean-centered, L2-normalized pixel vector.
+    Re-encodes and resolution changes of the same video yield a high cosine similarity.
+    
+    Args:
+        file_path: Path to the video file
+        duration: Duration of the video in seconds
+        num_frames: Number of frames to sample
+        size: Width and height of each downscaled frame
+        
+    Returns:
+        1-D float32 array of length num_frames * size * size
+    """
+    frame_len = size * size
+    try:
+        out, _ = (
+            ffmpeg
+            .input(file_path)
+            .filter('fps', fps=num_frames / max(duration, 1.0))
+            .filter('scale', size, size)
+            .output('pipe:', format='rawvideo', pix_fmt='gray', vframes=num_frames)
+            .run(capture_stdout=True, capture_stderr=True)
+        )
+    except ffmpeg.Error as e:
+        raise ValueError(f"Failed to compute fingerprint: {e.stderr}")
+    
+    vector = np.zeros(num_frames * frame_len, dtype=np.float32)
+    pixels = np.frombuffer(out, dtype=np.uint8)[:vector.size]
+    vector[:pixels.size] = pixels
+    
+    vector -= vector.mean()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
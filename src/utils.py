@@ -40,14 +40,3 @@ def ensure_directories():
     """
     pass
 
-
-def format_duration(seconds):
-    """Format seconds as MM:SS.
-    
-    Args:
-        seconds (float): Duration in seconds
-        
-    Returns:
-        str: Formatted duration string
-    """
-    pass 
\ No newline at end of file
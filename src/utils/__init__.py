@@ -1,3 +1,16 @@
 """
 Utility modules for the video analysis pipeline.
-""" 
\ No newline at end of file
+""" 
+
+
+def format_duration(seconds):
+    """Format seconds as MM:SS.
+    
+    Args:
+        seconds (float): Duration in seconds
+        
+    Returns:
+        str: Formatted duration string
+    """
+    minutes, secs = divmod(int(seconds), 60)
+    return f"{minutes:02d}:{secs:02d}"
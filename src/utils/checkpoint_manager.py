@@ -4,23 +4,490 @@ Checkpoint manager for resumable processing pipelines.
 """
 
 import os
+import re
+import copy
 import json
+import bisect
+import threading
 import time
 import shutil
 import logging
 import hashlib
 import glob
+import fnmatch
+import functools
+import heapq
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union, Tuple
+from typing import Any, Deque, Dict, Iterator, List, Optional, Set, Union, Tuple
+
+# orjson serializes much faster than the stdlib; fall back to json when it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# simdjson parses checkpoints lazily; one module-level parser reuses its internal buffer
+try:
+    import simdjson
+    _simdjson_parser = simdjson.Parser()
+except ImportError:
+    simdjson = None
+    _simdjson_parser = None
+
+# MessagePack is a compact binary alternative to JSON for checkpoints with large stage data
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Checkpoint file suffix -> serialization format
+_FORMAT_BY_SUFFIX = {".json": "json", ".msgpack": "msgpack"}
+
+# Characters not allowed in checkpoint file names; \w matches exactly what str.isalnum() accepts, plus "_"
+_UNSAFE_NAME_CHARS = re.compile(r"[^\w.\- ]")
+
+# Per-stage data files live in a directory named after the checkpoint, e.g. checkpoint_video.stages,
+# so they can't be mistaken for another video's checkpoint
+_STAGE_DIR_SUFFIX = ".stages"
+
+# Stem of a per-stage data file, e.g. 2_17 for stage 2 written by journal entry 17
+_STAGE_FILE_RE = re.compile(r"(\d+)_(\d+)")
+
+
+def _dumps(data: Dict[str, Any]) -> bytes:
+    """Serialize checkpoint data to indented JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2).encode('utf-8')
+
+
+def _loads(raw: bytes) -> Any:
+    """Parse JSON checkpoint bytes."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _encode(data: Dict[str, Any], fmt: str) -> bytes:
+    """Serialize checkpoint data in the given format ("json" or "msgpack")."""
+    if fmt == "msgpack":
+        return msgpack.packb(data, use_bin_type=True)
+    return _dumps(data)
+
+
+def _decode(raw: bytes, fmt: str) -> Any:
+    """Parse checkpoint bytes in the given format ("json" or "msgpack")."""
+    if fmt == "msgpack":
+        return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+    return _loads(raw)
+
+
+def _encode_entry(entry: Dict[str, Any], fmt: str) -> bytes:
+    """Serialize a journal entry: a line of compact JSON, or one self-delimiting MessagePack object."""
+    if fmt == "msgpack":
+        return msgpack.packb(entry, use_bin_type=True)
+    if orjson is not None:
+        return orjson.dumps(entry, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(entry).encode('utf-8') + b"\n"
+
+
+def _iter_journal(f: Any, fmt: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield journal entries from an open binary file, stopping at a torn final entry.
+
+    Args:
+        f: Journal file opened in binary mode
+        fmt: Serialization format of the journal
+    """
+    if fmt == "msgpack":
+        # The unpacker stops at EOF and leaves an incomplete trailing object unread
+        unpacker = msgpack.Unpacker(f, raw=False, strict_map_key=False)
+        try:
+            yield from unpacker
+        except ValueError:
+            logging.warning(f"Ignoring corrupt journal entry in {f.name}")
+        return
+
+    for line in f:
+        try:
+            yield _loads(line)
+        except ValueError:
+            # A torn final line from an interrupted write; nothing after it is valid
+            logging.warning(f"Ignoring truncated journal entry in {f.name}")
+            return
+
+
+def _apply_journal_entry(data: Dict[str, Any], entry: Dict[str, Any],
+                         completed: Optional[Set[int]] = None) -> None:
+    """
+    Apply a single journal entry to checkpoint data in place.
+
+    Args:
+        data: Checkpoint data dictionary
+        entry: Journal entry as written by CheckpointManager._journal
+        completed: Optional set mirroring data["stages_completed"], kept in sync and used for membership tests
+    """
+    if entry["op"] == "stage_complete":
+        stage_index = entry["idx"]
+        data.setdefault("stage_names", {}).setdefault(
+            str(stage_index), {"name": entry["name"], "description": ""})
+        stages_completed = data["stages_completed"]
+        if completed is None:
+            # No set mirror while replaying; binary-search the sorted list instead of scanning it
+            pos = bisect.bisect_left(stages_completed, stage_index)
+            if pos == len(stages_completed) or stages_completed[pos] != stage_index:
+                stages_completed.insert(pos, stage_index)
+        elif stage_index not in completed:
+            # The list stays sorted, so insert in place rather than re-sorting
+            bisect.insort(stages_completed, stage_index)
+            completed.add(stage_index)
+        data["current_stage"] = stage_index + 1
+        if entry.get("stage_file"):
+            # Stage data lives in its own file; drop any inline copy from older checkpoints
+            data.setdefault("stage_files", {})[str(stage_index)] = entry["stage_file"]
+            data.get("data", {}).pop(str(stage_index), None)
+        elif entry.get("data"):
+            data.setdefault("data", {})[str(stage_index)] = entry["data"]
+    elif entry["op"] == "error":
+        data.setdefault("errors", []).append(entry["error"])
+
+    data["metadata"]["last_updated"] = entry["ts"]
+    data["metadata"]["journal_seq"] = entry["seq"]
+
+
+def _replay_journal(data: Dict[str, Any], journal_path: Path, fmt: str = "json") -> int:
+    """
+    Replay journal entries newer than the snapshot onto checkpoint data.
+
+    Args:
+        data: Checkpoint data loaded from the snapshot
+        journal_path: Path to the journal file
+        fmt: Serialization format of the journal
+
+    Returns:
+        Number of entries applied
+    """
+    if not journal_path.exists():
+        return 0
+
+    snapshot_seq = data["metadata"].get("journal_seq", 0)
+    applied = 0
+    with open(journal_path, 'rb') as f:
+        for entry in _iter_journal(f, fmt):
+            if entry["seq"] <= snapshot_seq:
+                continue  # Already folded into the snapshot
+            _apply_journal_entry(data, entry)
+            applied += 1
+    return applied
+
+
+def _prune_stage_files(directory: Path, stem: str, suffix: str, fmt: str,
+                       referenced: Set[str], max_seq: int) -> None:
+    """
+    Delete a checkpoint's stage data files that neither its data nor any of its backups reference.
+
+    Only files in the checkpoint's own stage directory are considered.
+
+    Args:
+        directory: Checkpoint directory
+        stem: Stem of the main checkpoint file
+        suffix: Suffix of the main checkpoint file
+        fmt: Serialization format of the checkpoint and its backups
+        referenced: Stage file names referenced by the current checkpoint data
+        max_seq: Journal sequence number the checkpoint data is current to; files written by
+            later entries may not be recorded in it yet and are kept
+    """
+    stage_dir = directory / f"{stem}{_STAGE_DIR_SUFFIX}"
+    if not stage_dir.is_dir():
+        return
+    entries = _scan_dir(directory)
+    referenced = set(referenced)
+    backup_patterns = (f"{stem}_backup_*{suffix}", f"{stem}_reset_*{suffix}")
+    for entry in entries:
+        if any(fnmatch.fnmatch(entry.name, pattern) for pattern in backup_patterns):
+            try:
+                with open(entry.path, 'rb') as f:
+                    referenced.update(_decode(f.read(), fmt).get("stage_files", {}).values())
+            except (ValueError, IOError):
+                # What an unreadable backup refers to is unknown, so keep every stage file
+                return
+
+    for entry in _scan_dir(stage_dir):
+        name = f"{stage_dir.name}/{entry.name}"
+        if name in referenced or not entry.name.endswith(suffix):
+            continue
+        match = _STAGE_FILE_RE.fullmatch(entry.name[:-len(suffix)])
+        if match is None or int(match.group(2)) > max_seq:
+            continue
+        try:
+            os.unlink(entry.path)
+            logging.debug(f"Removed unreferenced stage file: {name}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logging.warning(f"Failed to remove unreferenced stage file {name}: {e}")
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    """
+    Back up a file by hardlinking it, copying only if links aren't supported.
+
+    Checkpoints are replaced with os.replace rather than rewritten in place, so
+    a hardlink keeps the previous version intact without copying its bytes.
+
+    Args:
+        src: File to back up
+        dst: Backup path
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _write_all(fd: int, payload: bytes) -> None:
+    """Write the whole payload to a file descriptor, repeating only on a short write."""
+    view = memoryview(payload)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _write_file(path: Path, payload: bytes) -> None:
+    """
+    Write bytes to a file through a raw file descriptor.
+
+    Skips Python's buffered I/O layer: the payload is already fully encoded, so
+    a single os.write is all that's needed.
+
+    Args:
+        path: File to create or truncate
+        payload: Bytes to write
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        _write_all(fd, payload)
+    finally:
+        os.close(fd)
+
+
+def _write_tmpfile(temp_path: Path, payload: bytes) -> None:
+    """
+    Write bytes to an anonymous O_TMPFILE and link it in as temp_path once complete.
+
+    Raises OSError where O_TMPFILE or /proc isn't available.
+
+    Args:
+        temp_path: Name to give the fully written file
+        payload: Bytes to write
+    """
+    fd = os.open(temp_path.parent, os.O_TMPFILE | os.O_WRONLY, 0o666)
+    try:
+        _write_all(fd, payload)
+        # linkat can't replace an existing name
+        try:
+            temp_path.unlink()
+        except FileNotFoundError:
+            pass
+        # Linking through /proc needs AT_SYMLINK_FOLLOW, which os.link only passes with a dir fd
+        proc_fd = os.open("/proc/self/fd", os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.link(str(fd), temp_path, src_dir_fd=proc_fd, follow_symlinks=True)
+        finally:
+            os.close(proc_fd)
+    finally:
+        os.close(fd)
+
+
+def _replace_file(path: Path, payload: bytes) -> None:
+    """
+    Atomically replace a file's contents.
+
+    On Linux the payload is written to an anonymous O_TMPFILE in the target
+    directory and only given a name once complete, so a crash mid-write leaves
+    no partial temp file behind. Elsewhere, or on filesystems without O_TMPFILE
+    support, a visible .tmp file is written and renamed.
+
+    Args:
+        path: File to replace
+        payload: New contents
+    """
+    temp_path = path.with_suffix('.tmp')
+    linked = False
+    if hasattr(os, "O_TMPFILE"):
+        try:
+            _write_tmpfile(temp_path, payload)
+            linked = True
+        except OSError:
+            pass  # Fall back to a visible temp file
+
+    try:
+        if not linked:
+            _write_file(temp_path, payload)
+        os.replace(temp_path, path)
+    except OSError:
+        if temp_path.exists():
+            temp_path.unlink()
+        raise
+
+
+@functools.lru_cache(maxsize=32)
+def _read_stage_file(path: str, inode: int, mtime_ns: int, size: int) -> bytes:
+    """Read a stage data file; keyed on inode, mtime and size so a replaced file is re-read."""
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _load_stage_file(path: str, inode: int, mtime_ns: int, size: int, fmt: str) -> Any:
+    """Decode a stage data file into a new object, so callers can't mutate a cached copy."""
+    return _decode(_read_stage_file(path, inode, mtime_ns, size), fmt)
+
+
+def _files_by_mtime(entries: List[os.DirEntry], pattern: str, newest_first: bool = True) -> List[Path]:
+    """
+    Filter directory entries by a glob pattern and sort them by modification time.
+
+    DirEntry caches its stat result, so each file is stat'ed at most once.
+
+    Args:
+        entries: Entries from os.scandir
+        pattern: fnmatch-style pattern matched against the file name
+        newest_first: Sort newest first (default) or oldest first
+
+    Returns:
+        Paths of the matching files
+    """
+    matches = [e for e in entries if fnmatch.fnmatch(e.name, pattern)]
+    matches.sort(key=lambda e: e.stat().st_mtime, reverse=newest_first)
+    return [Path(e.path) for e in matches]
+
+
+def _files_to_prune(entries: List[os.DirEntry], pattern: str, keep: int) -> List[Path]:
+    """
+    Find the files matching a pattern that fall outside the newest `keep`.
+
+    Only the overflow is selected (heapq.nsmallest), rather than sorting every match.
+
+    Args:
+        entries: Entries from os.scandir
+        pattern: fnmatch-style pattern matched against the file name
+        keep: Number of most recent files to keep
+
+    Returns:
+        Paths of the oldest matching files beyond `keep`
+    """
+    matches = [e for e in entries if fnmatch.fnmatch(e.name, pattern)]
+    if len(matches) <= keep:
+        return []
+    oldest = heapq.nsmallest(len(matches) - keep, matches, key=lambda e: e.stat().st_mtime)
+    return [Path(e.path) for e in oldest]
+
+
+def _scan_dir(directory: Path) -> List[os.DirEntry]:
+    """List the entries of a directory with a single scandir call."""
+    with os.scandir(directory) as it:
+        return list(it)
+
+
+# (summary key, JSON pointer, default) for the fields read by list_all_checkpoints
+_SUMMARY_POINTERS = (
+    ("video_path", "/video_path", "unknown"),
+    ("current_stage", "/current_stage", 0),
+    ("stages_completed", "/stages_completed", []),
+    ("stage_names", "/stage_names", {}),
+    ("last_updated", "/metadata/last_updated", 0),
+)
+
+
+def _next_stage(current_stage: int, stages_completed: List[int], stage_names: Dict[str, Any]) -> int:
+    """
+    Find the next stage to execute.
+    
+    Stage indices need not be contiguous (the LangGraph pipeline has no
+    detect_moments stage), so when stages are registered this is the first
+    registered stage from current_stage on that hasn't been completed.
+    
+    Args:
+        current_stage: Stage after the last completed one
+        stages_completed: Indices of the completed stages
+        stage_names: Registered stages, keyed by index as a string
+        
+    Returns:
+        Index of the next stage to run
+    """
+    completed = set(stages_completed)
+    pending = [
+        int(stage_index) for stage_index in stage_names
+        if int(stage_index) >= current_stage and int(stage_index) not in completed
+    ]
+    return min(pending, default=current_stage)
+
+
+def _load_summary(checkpoint_file: Path) -> Dict[str, Any]:
+    """
+    Read only the fields of a checkpoint file needed for listing.
+
+    Args:
+        checkpoint_file: Path to the checkpoint file
+
+    Returns:
+        Dictionary with video_path, current_stage, stages_completed, stage_names and last_updated
+    """
+    fmt = _FORMAT_BY_SUFFIX[checkpoint_file.suffix]
+    raw = checkpoint_file.read_bytes()
+    journal_path = checkpoint_file.with_suffix('.jnl')
+    if fmt != "json" or _simdjson_parser is None or journal_path.exists():
+        # Without simdjson, or with pending journal entries, the whole document has to be decoded
+        data = _decode(raw, fmt)
+        _replay_journal(data, journal_path, fmt)
+        summary = {}
+        for key, pointer, default in _SUMMARY_POINTERS:
+            value = data
+            for part in pointer.strip("/").split("/"):
+                value = value.get(part) if isinstance(value, dict) else None
+            summary[key] = default if value is None else value
+        return summary
+
+    doc = _simdjson_parser.parse(raw)
+    summary = {}
+    # JSON pointers jump straight to each field; the "data" subtree is never decoded
+    for key, pointer, default in _SUMMARY_POINTERS:
+        try:
+            value = doc.at_pointer(pointer)
+        except (KeyError, IndexError, ValueError):
+            value = default
+        if isinstance(value, simdjson.Array):
+            value = value.as_list()
+        elif isinstance(value, simdjson.Object):
+            value = value.as_dict()
+        summary[key] = value
+    # The parser can't be reused while proxies into the previous document are alive
+    del doc, value
+    return summary
+
 
 class CheckpointManager:
     """Manages checkpoint data for resumable processing pipelines."""
     
+    checkpoint_dir: Path
+    checkpoint_file: str
+    checkpoint_path: Path
+    checkpoint_format: str
+    video_path: Optional[str]
+    max_backups: int
+    snapshot_every: int
+    data: Dict[str, Any]
+    stage_names: Dict[str, Dict[str, str]]
+    
     def __init__(self, 
                  checkpoint_dir: str = "./checkpoints", 
                  checkpoint_file: Optional[str] = None,
                  video_path: Optional[str] = None,
-                 max_backups: int = 1):
+                 max_backups: int = 1,
+                 snapshot_every: int = 10,
+                 checkpoint_format: str = "json"):
         """
         Initialize checkpoint manager.
         
@@ -29,38 +496,95 @@ class CheckpointManager:
             checkpoint_file: Optional name of the checkpoint file (if not provided, will be derived from video_path)
             video_path: Optional path to the video file being processed (used to generate checkpoint filename)
             max_backups: Maximum number of backup files to keep per checkpoint (default: 1)
+            snapshot_every: Number of journaled updates after which a full snapshot is written (default: 10)
+            checkpoint_format: "json" or "msgpack" for derived checkpoint file names; an explicit
+                checkpoint_file is read and written in the format matching its suffix (default: "json")
         """
         self.checkpoint_dir = Path(checkpoint_dir)
         self.max_backups = max_backups
+        self.snapshot_every = snapshot_every
+        
+        if checkpoint_format == "msgpack" and msgpack is None:
+            logging.warning("msgpack is not installed; writing JSON checkpoints instead")
+            checkpoint_format = "json"
+        suffix = ".msgpack" if checkpoint_format == "msgpack" else ".json"
         
         # If video_path is provided, use it to create a unique checkpoint file name
         if video_path and not checkpoint_file:
             video_name = Path(video_path).stem
             # Create a safe filename by removing any problematic characters
-            safe_name = ''.join(c if c.isalnum() or c in '._- ' else '_' for c in video_name)
-            self.checkpoint_file = f"checkpoint_{safe_name}.json"
+            safe_name = _UNSAFE_NAME_CHARS.sub('_', video_name)
+            self.checkpoint_file = f"checkpoint_{safe_name}{suffix}"
         else:
             # Fall back to default or provided checkpoint file
-            self.checkpoint_file = checkpoint_file or "checkpoint.json"
+            self.checkpoint_file = checkpoint_file or f"checkpoint{suffix}"
         
         self.checkpoint_path = self.checkpoint_dir / self.checkpoint_file
+        
+        # Name parts used for backup, reset and stage file names, computed once
+        self._stem = self.checkpoint_path.stem
+        self._suffix = self.checkpoint_path.suffix
+        self._backup_pattern = f"{self._stem}_backup_*{self._suffix}"
+        self._reset_pattern = f"{self._stem}_reset_*{self._suffix}"
+        
+        self.checkpoint_format = _FORMAT_BY_SUFFIX.get(self._suffix, "json")
+        if self.checkpoint_format == "msgpack" and msgpack is None:
+            raise ImportError("msgpack is required to use .msgpack checkpoint files")
         self.video_path = video_path
         
+        # Stage completions and errors are appended here between full snapshots
+        self._journal_path = self.checkpoint_path.with_suffix('.jnl')
+        self._journal_ops: int = 0
+        # Append-mode descriptor for the journal, kept open between appends
+        self._journal_fd: Optional[int] = None
+        
+        # Journal entries held back while inside batch()
+        self._in_batch: bool = False
+        self._pending_entries: List[Dict[str, Any]] = []
+        # Stage data held back until flush(), with the journal entry that will point to it
+        self._unwritten_stage_data: Dict[int, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+        
+        # Background snapshot writes: at most one queued snapshot, superseded by newer ones
+        self._save_executor: Optional[ThreadPoolExecutor] = None
+        self._save_future: Optional[Future] = None
+        self._save_lock = threading.Lock()
+        self._save_running = False
+        self._queued_snapshot: Optional[Tuple[Dict[str, Any], bool]] = None
+        # First background save failure, raised to the caller by the next wait_for_saves()
+        self._save_error: Optional[BaseException] = None
+        # Serializes file writes between the caller and the background thread
+        self._io_lock = threading.Lock()
+        
+        # Digest and timestamp of the last snapshot written, used to skip unchanged saves
+        self._last_digest: Optional[bytes] = None
+        self._last_saved_at: int = 0
+        
         # Create checkpoint directory if it doesn't exist
         self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
         
+        # Backup files for this checkpoint, oldest first; scanned once and then tracked in memory
+        self._backup_files: Deque[Path] = deque(
+            _files_by_mtime(_scan_dir(self.checkpoint_dir), self._backup_pattern, newest_first=False)
+        )
+        
+        # Stage name mapping (populated when stages are registered or restored from the checkpoint)
+        self.stage_names = {}
+        
         # Initialize or load checkpoint data
         self.data = self._load_or_create()
+        self._journal_seq: int = self.data["metadata"].get("journal_seq", 0)
+        self._last_saved_at = self.data["metadata"]["last_updated"]
         
-        # Stage name mapping (will be populated when stages are registered)
-        self.stage_names = {}
+        # Set mirror of data["stages_completed"] for O(1) membership tests
+        self._completed_set: Set[int] = set(self.data["stages_completed"])
     
     def _load_or_create(self) -> Dict[str, Any]:
         """Load existing checkpoint or create a new one."""
         if self.checkpoint_path.exists():
             try:
-                with open(self.checkpoint_path, 'r') as f:
-                    checkpoint_data = json.load(f)
+                with open(self.checkpoint_path, 'rb') as f:
+                    raw = f.read()
+                    checkpoint_data = _decode(raw, self.checkpoint_format)
                     
                     # Add video_path to checkpoint if not present
                     if self.video_path and "video_path" not in checkpoint_data:
@@ -69,44 +593,71 @@ class CheckpointManager:
                     # Restore stage name mapping if present
                     if "stage_names" in checkpoint_data:
                         self.stage_names = checkpoint_data["stage_names"]
+                    
+                    # Bring the snapshot up to date with updates journaled since it was written
+                    self._journal_ops = _replay_journal(checkpoint_data, self._journal_path,
+                                                        self.checkpoint_format)
+                    
+                    # An unmodified snapshot doesn't need rewriting until something changes
+                    if self._journal_ops == 0:
+                        self._last_digest = hashlib.blake2b(raw, digest_size=16).digest()
                         
                     return checkpoint_data
-            except (json.JSONDecodeError, IOError) as e:
+            except (ValueError, IOError) as e:
                 logging.warning(f"Failed to load checkpoint {self.checkpoint_path}: {e}")
                 # Fall back to creating a new checkpoint
         
+        # A journal without a snapshot refers to a checkpoint that no longer exists
+        if self._journal_path.exists():
+            self._journal_path.unlink()
+        
         # Default checkpoint structure
+        now = int(time.time())
         return {
             "video_path": self.video_path,
             "current_stage": 0,
             "stages_completed": [],
             "stage_names": {},
             "data": {},
+            "stage_files": {},
             "metadata": {
-                "start_time": int(time.time()),
-                "last_updated": int(time.time()),
+                "start_time": now,
+                "last_updated": now,
                 "version": "1.0"
             },
             "errors": []
         }
     
-    def _cleanup_old_backups(self):
-        """Remove old backup files, keeping only the most recent ones."""
-        backup_pattern = f"{self.checkpoint_path.stem}_backup_*.json"
-        backup_files = sorted(
-            self.checkpoint_dir.glob(backup_pattern),
-            key=lambda f: f.stat().st_mtime,
-            reverse=True
-        )
+    def _cleanup_old_backups(self) -> bool:
+        """
+        Remove old backup files, keeping only the most recent ones.
         
-        # Keep only the most recent backups
-        if len(backup_files) > self.max_backups:
-            for old_file in backup_files[self.max_backups:]:
-                try:
-                    old_file.unlink()
-                    logging.debug(f"Removed old backup: {old_file}")
-                except OSError as e:
-                    logging.warning(f"Failed to remove old backup {old_file}: {e}")
+        Returns:
+            True if any backup was removed
+        """
+        removed = False
+        while len(self._backup_files) > self.max_backups:
+            removed = True
+            old_file = self._backup_files.popleft()
+            try:
+                old_file.unlink()
+                logging.debug(f"Removed old backup: {old_file}")
+            except FileNotFoundError:
+                pass  # Already removed, e.g. by cleanup_all_backups
+            except OSError as e:
+                logging.warning(f"Failed to remove old backup {old_file}: {e}")
+        return removed
+    
+    def _prune_stage_files(self, data: Dict[str, Any]) -> None:
+        """
+        Delete stage files that neither data nor any backup references.
+        
+        Args:
+            data: Checkpoint data being written
+        """
+        _prune_stage_files(self.checkpoint_dir, self._stem, self._suffix, self.checkpoint_format,
+                           set(data.get("stage_files", {}).values()),
+                           data["metadata"].get("journal_seq", 0))
     
     def register_stages(self, stages: List[Tuple[int, str, str]]) -> None:
         """
@@ -126,46 +677,256 @@ class CheckpointManager:
         self.data["stage_names"] = stage_names
         self.save()
     
-    def save(self, create_backup: bool = True) -> None:
+    def _prepare_snapshot(self) -> None:
+        """Stamp the in-memory data before it is written as a snapshot."""
+        # Record the last journal entry folded into this snapshot; last_updated is stamped on write
+        self.data["metadata"]["journal_seq"] = self._journal_seq
+        
+        # Ensure stage names are in the data
+        if self.stage_names and "stage_names" not in self.data:
+            self.data["stage_names"] = self.stage_names
+    
+    def _write_snapshot(self, data: Dict[str, Any], create_backup: bool) -> None:
         """
-        Save checkpoint data to file.
+        Atomically write a snapshot to the checkpoint file. Must be called with _io_lock held.
         
         Args:
+            data: Checkpoint data to write
             create_backup: Whether to create a backup of the previous checkpoint
         """
-        # Update timestamp
-        self.data["metadata"]["last_updated"] = int(time.time())
-        
-        # Ensure stage names are in the data
-        if self.stage_names and "stage_names" not in self.data:
-            self.data["stage_names"] = self.stage_names
+        # Encode with the previous timestamp first so an unchanged checkpoint hashes the same
+        metadata = data["metadata"]
+        metadata["last_updated"] = self._last_saved_at
+        payload = _encode(data, self.checkpoint_format)
+        if (hashlib.blake2b(payload, digest_size=16).digest() == self._last_digest
+                and self.checkpoint_path.exists()):
+            logging.debug(f"Checkpoint unchanged, skipping save of {self.checkpoint_path}")
+            return
         
-        # Create temp file for atomic write
-        temp_path = self.checkpoint_path.with_suffix('.tmp')
+        now = int(time.time())
+        if now != self._last_saved_at:
+            metadata["last_updated"] = now
+            payload = _encode(data, self.checkpoint_format)
         
         try:
-            # Write to temp file first
-            with open(temp_path, 'w') as f:
-                json.dump(self.data, f, indent=2)
-            
             # Create backup if requested and previous file exists
             if create_backup and self.checkpoint_path.exists():
-                backup_path = self.checkpoint_dir / f"{self.checkpoint_path.stem}_backup_{int(time.time())}.json"
-                shutil.copy2(self.checkpoint_path, backup_path)
-                # Clean up old backups
-                self._cleanup_old_backups()
+                backup_path = self.checkpoint_dir / f"{self._stem}_backup_{now}{self._suffix}"
+                _link_or_copy(self.checkpoint_path, backup_path)
+                if not self._backup_files or self._backup_files[-1] != backup_path:
+                    self._backup_files.append(backup_path)
+                # Clean up old backups, then the stage files only they referred to
+                if self._cleanup_old_backups():
+                    self._prune_stage_files(data)
             
             # Perform atomic replacement
-            os.replace(temp_path, self.checkpoint_path)
+            _replace_file(self.checkpoint_path, payload)
+            self._last_digest = hashlib.blake2b(payload, digest_size=16).digest()
+            self._last_saved_at = now
+            
+            # Drop the journal if the snapshot covers all of it; otherwise replay skips the covered entries
+            if data["metadata"]["journal_seq"] == self._journal_seq:
+                self._close_journal()
+                if self._journal_path.exists():
+                    self._journal_path.unlink()
         
         except IOError as e:
-            if temp_path.exists():
-                temp_path.unlink()
             logging.error(f"Failed to save checkpoint: {e}")
             raise
     
+    def save(self, create_backup: bool = True) -> None:
+        """
+        Save checkpoint data to file.
+        
+        Args:
+            create_backup: Whether to create a backup of the previous checkpoint
+        """
+        # Let any background save finish so it can't overwrite this one
+        self.wait_for_saves()
+        self._write_unwritten_stage_data()
+        self._prepare_snapshot()
+        
+        with self._io_lock:
+            self._write_snapshot(self.data, create_backup)
+        self._journal_ops = 0
+        self._pending_entries.clear()
+    
+    def save_async(self, create_backup: bool = True) -> None:
+        """
+        Save checkpoint data on a background thread.
+        
+        The data is copied before returning, so callers can keep mutating it.
+        If a save is already queued, it is replaced by this newer snapshot.
+        
+        Args:
+            create_backup: Whether to create a backup of the previous checkpoint
+        """
+        self._write_unwritten_stage_data()
+        self._prepare_snapshot()
+        snapshot = copy.deepcopy(self.data)
+        self._journal_ops = 0
+        self._pending_entries.clear()
+        
+        with self._save_lock:
+            self._queued_snapshot = (snapshot, create_backup)
+            if not self._save_running:
+                if self._save_executor is None:
+                    self._save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint-save")
+                self._save_running = True
+                self._save_future = self._save_executor.submit(self._drain_saves)
+    
+    def _drain_saves(self) -> None:
+        """Write queued snapshots until the queue is empty (runs on the save thread)."""
+        while True:
+            with self._save_lock:
+                job = self._queued_snapshot
+                self._queued_snapshot = None
+                if job is None:
+                    self._save_running = False
+                    return
+            
+            data, create_backup = job
+            try:
+                with self._io_lock:
+                    self._write_snapshot(data, create_backup)
+            except Exception as e:
+                logging.exception(f"Background save of {self.checkpoint_path} failed")
+                with self._save_lock:
+                    if self._save_error is None:
+                        self._save_error = e
+    
+    def wait_for_saves(self) -> None:
+        """
+        Block until all background saves have been written.
+        
+        Raises:
+            Exception: The first background save failure since the last call
+        """
+        with self._save_lock:
+            future = self._save_future
+        if future is not None:
+            future.result()
+        with self._save_lock:
+            error, self._save_error = self._save_error, None
+        if error is not None:
+            raise error
+    
+    def close(self) -> None:
+        """
+        Flush held-back updates, finish pending background saves and release the save thread and journal descriptor.
+        
+        Raises:
+            Exception: If flushing or a background save failed; resources are released either way
+        """
+        try:
+            self.flush()
+            self.wait_for_saves()
+        finally:
+            if self._save_executor is not None:
+                self._save_executor.shutdown(wait=True)
+                self._save_executor = None
+            with self._io_lock:
+                self._close_journal()
+    
+    def __enter__(self) -> "CheckpointManager":
+        return self
+    
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        self.close()
+    
+    def checkpoint(self) -> None:
+        """Write a full snapshot, folding in and truncating the journal."""
+        self.save()
+    
+    def _journal(self, entry: Dict[str, Any], flush: bool = True) -> None:
+        """
+        Apply an update and append it to the journal, snapshotting every snapshot_every updates.
+        
+        Args:
+            entry: Journal entry with an "op" key and op-specific fields
+            flush: Whether to persist the update now; otherwise it waits for the next flush
+        """
+        self._journal_seq += 1
+        entry["seq"] = self._journal_seq
+        if "ts" not in entry:
+            entry["ts"] = int(time.time())
+        _apply_journal_entry(self.data, entry, self._completed_set)
+        
+        self._journal_ops += 1
+        self._pending_entries.append(entry)
+        if flush and not self._in_batch:
+            self.flush()
+    
+    def flush(self) -> None:
+        """Write stage data and journal entries held back by batch() or mark_stage_complete(flush=False)."""
+        # Stage files go first, so a journal entry never points to a file that isn't there yet
+        self._write_unwritten_stage_data()
+        self._flush_journal()
+    
+    def _write_unwritten_stage_data(self) -> None:
+        """Write held-back stage data and record it in stage_files, ahead of any journal append or snapshot."""
+        for stage_index, (stage_data, entry) in self._unwritten_stage_data.items():
+            entry["stage_file"] = self._store_stage_data(stage_index, stage_data, entry["seq"])
+            self.data.setdefault("stage_files", {})[str(stage_index)] = entry["stage_file"]
+            self.data.get("data", {}).pop(str(stage_index), None)
+        self._unwritten_stage_data.clear()
+    
+    def _flush_journal(self) -> None:
+        """Persist pending journal entries in one append, or as a snapshot when one is due."""
+        if not self._pending_entries:
+            return
+        
+        if not self.checkpoint_path.exists():
+            # The first snapshot is written synchronously so the journal always has a base
+            self.save()
+            return
+        if self._journal_ops >= self.snapshot_every:
+            self.save_async()
+            return
+        
+        try:
+            with self._io_lock:
+                # Reopen if the journal was removed underneath us, e.g. by another manager's snapshot
+                if self._journal_fd is not None and os.fstat(self._journal_fd).st_nlink == 0:
+                    self._close_journal()
+                if self._journal_fd is None:
+                    self._journal_fd = os.open(self._journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o666)
+                _write_all(self._journal_fd, b"".join(_encode_entry(entry, self.checkpoint_format)
+                                                      for entry in self._pending_entries))
+            self._pending_entries.clear()
+        except IOError as e:
+            logging.error(f"Failed to append to checkpoint journal: {e}")
+            raise
+    
+    def _close_journal(self) -> None:
+        """Close the journal descriptor if open. Must be called with _io_lock held."""
+        if self._journal_fd is not None:
+            os.close(self._journal_fd)
+            self._journal_fd = None
+    
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Defer persisting stage completions and errors until the block exits.
+        
+        Updates made inside the block, including stage data, are applied in
+        memory immediately and written together on exit, so several stages cost
+        a single write.
+        """
+        if self._in_batch:
+            yield
+            return
+        
+        self._in_batch = True
+        try:
+            yield
+        finally:
+            self._in_batch = False
+            self.flush()
+    
     def mark_stage_complete(self, stage_index: int, stage_name: str, 
-                           stage_data: Optional[Dict[str, Any]] = None) -> None:
+                           stage_data: Optional[Dict[str, Any]] = None,
+                           flush: bool = True) -> None:
         """
         Mark a stage as complete and store its data.
         
@@ -173,30 +934,71 @@ class CheckpointManager:
             stage_index: Index of the stage
             stage_name: Name of the stage
             stage_data: Data to store for this stage
+            flush: Whether to write now; otherwise the completion is kept in memory
+                until flush(), close() or the end of a batch()
         """
         # Record stage name if not already in mapping
         if str(stage_index) not in self.stage_names:
             self.stage_names[str(stage_index)] = {"name": stage_name, "description": ""}
             self.data["stage_names"] = self.stage_names
         
-        # Mark stage as completed
-        if stage_index not in self.data["stages_completed"]:
-            self.data["stages_completed"].append(stage_index)
+        # Mark stage as completed and advance the current stage
+        entry = {"op": "stage_complete", "idx": stage_index, "name": stage_name, "stage_file": None}
         
-        # Sort to ensure ordering
-        self.data["stages_completed"].sort()
+        # Stage data is stored separately, written once, so the main checkpoint stays small
+        if stage_data:
+            if flush and not self._in_batch:
+                # Named after the journal entry that records it, which _journal numbers next
+                entry["stage_file"] = self._store_stage_data(stage_index, stage_data, self._journal_seq + 1)
+            else:
+                self._unwritten_stage_data[stage_index] = (stage_data, entry)
         
-        # Update current stage to next
-        self.data["current_stage"] = stage_index + 1
+        self._journal(entry, flush)
+    
+    def _store_stage_data(self, stage_index: int, stage_data: Dict[str, Any], seq: int) -> str:
+        """
+        Persist a stage's data outside the main checkpoint.
         
-        # Store stage data if provided
-        if stage_data:
-            if "data" not in self.data:
-                self.data["data"] = {}
-            self.data["data"][str(stage_index)] = stage_data
+        Each write goes to a new file in the checkpoint's stage directory, named
+        after its journal entry, so backups keep pointing at the data they were taken with.
         
-        # Save changes
-        self.save()
+        Args:
+            stage_index: Index of the stage
+            stage_data: Data to store for this stage
+            seq: Sequence number of the journal entry recording the stage
+            
+        Returns:
+            Location of the stored data, recorded in the checkpoint's stage_files
+        """
+        stage_dir = self.checkpoint_dir / f"{self._stem}{_STAGE_DIR_SUFFIX}"
+        stage_file = f"{stage_dir.name}/{stage_index}_{seq}{self._suffix}"
+        try:
+            stage_dir.mkdir(exist_ok=True)
+            _replace_file(self.checkpoint_dir / stage_file, _encode(stage_data, self.checkpoint_format))
+        except IOError as e:
+            logging.error(f"Failed to save data for stage {stage_index}: {e}")
+            raise
+        return stage_file
+    
+    def _load_stage_data(self, stage_index: int, stage_file: str) -> Optional[Dict[str, Any]]:
+        """
+        Load a stage's data stored by _store_stage_data.
+        
+        Args:
+            stage_index: Index of the stage
+            stage_file: Location returned by _store_stage_data
+            
+        Returns:
+            Stage data or None if it can't be read
+        """
+        stage_path = self.checkpoint_dir / stage_file
+        try:
+            st = stage_path.stat()
+            return _load_stage_file(str(stage_path), st.st_ino, st.st_mtime_ns, st.st_size,
+                                    self.checkpoint_format)
+        except (ValueError, IOError) as e:
+            logging.warning(f"Failed to load data for stage {stage_index} from {stage_path}: {e}")
+            return None
     
     def is_stage_completed(self, stage_index: int) -> bool:
         """
@@ -208,7 +1010,7 @@ class CheckpointManager:
         Returns:
             True if the stage has been completed, False otherwise
         """
-        return stage_index in self.data["stages_completed"]
+        return stage_index in self._completed_set
     
     def get_stage_data(self, stage_index: int) -> Optional[Dict[str, Any]]:
         """
@@ -220,7 +1022,39 @@ class CheckpointManager:
         Returns:
             Stage data or None if not found
         """
-        return self.data.get("data", {}).get(str(stage_index))
+        # Data that hasn't been flushed yet is newer than anything on disk
+        unwritten = self._unwritten_stage_data.get(stage_index)
+        if unwritten is not None:
+            return unwritten[0]
+        
+        # Checkpoints written before stage files were introduced keep data inline
+        inline_data = self.data.get("data", {}).get(str(stage_index))
+        if inline_data is not None:
+            return inline_data
+        
+        stage_file = self.data.get("stage_files", {}).get(str(stage_index))
+        if stage_file is None:
+            return None
+        return self._load_stage_data(stage_index, stage_file)
+    
+    def load_all(self, before: Optional[int] = None) -> Dict[int, Dict[str, Any]]:
+        """
+        Get the data of every completed stage in one pass.
+        
+        Args:
+            before: Only load stages with a lower index (None for all)
+        
+        Returns:
+            Stage data keyed by stage index, for completed stages that stored data
+        """
+        all_data = {}
+        for stage_index in sorted(self._completed_set):
+            if before is not None and stage_index >= before:
+                break
+            stage_data = self.get_stage_data(stage_index)
+            if stage_data:
+                all_data[stage_index] = stage_data
+        return all_data
     
     def get_stage_name(self, stage_index: int) -> str:
         """
@@ -232,15 +1066,23 @@ class CheckpointManager:
         Returns:
             Stage name or "Unknown Stage" if not found
         """
-        stage_info = self.stage_names.get(str(stage_index), {})
+        stage_info = self.stage_names.get(str(stage_index))
+        if stage_info is None:
+            return f"Stage {stage_index}"
         return stage_info.get("name", f"Stage {stage_index}")
     
     def reset(self) -> None:
         """Clear checkpoint data and create new empty checkpoint."""
+        self.wait_for_saves()
+        now = int(time.time())
+        
         # Create backup of current state
         if self.checkpoint_path.exists():
-            backup_path = self.checkpoint_dir / f"{self.checkpoint_path.stem}_reset_{int(time.time())}.json"
-            shutil.copy2(self.checkpoint_path, backup_path)
+            # The backup copies the snapshot only, so fold in journaled updates first
+            if self._journal_ops:
+                self.save(create_backup=False)
+            backup_path = self.checkpoint_dir / f"{self._stem}_reset_{now}{self._suffix}"
+            _link_or_copy(self.checkpoint_path, backup_path)
             # Clean up excess reset backups
             self._cleanup_reset_backups()
         
@@ -254,34 +1096,30 @@ class CheckpointManager:
             "stages_completed": [],
             "stage_names": stage_names,
             "data": {},
+            "stage_files": {},
             "metadata": {
-                "start_time": int(time.time()),
-                "last_updated": int(time.time()),
+                "start_time": now,
+                "last_updated": now,
                 "version": "1.0"
             },
             "errors": []
         }
+        self._completed_set = set()
+        self._unwritten_stage_data.clear()
         
-        # Save the reset state
+        # Save the reset state, then drop stage files that only the pruned backups referred to
         self.save(create_backup=False)
+        self._prune_stage_files(self.data)
     
-    def _cleanup_reset_backups(self):
+    def _cleanup_reset_backups(self) -> None:
         """Remove old reset backup files, keeping only the most recent ones."""
-        reset_pattern = f"{self.checkpoint_path.stem}_reset_*.json"
-        reset_files = sorted(
-            self.checkpoint_dir.glob(reset_pattern),
-            key=lambda f: f.stat().st_mtime,
-            reverse=True
-        )
-        
         # Keep only the 2 most recent reset backups
-        if len(reset_files) > 2:
-            for old_file in reset_files[2:]:
-                try:
-                    old_file.unlink()
-                    logging.debug(f"Removed old reset backup: {old_file}")
-                except OSError as e:
-                    logging.warning(f"Failed to remove old reset backup {old_file}: {e}")
+        for old_file in _files_to_prune(_scan_dir(self.checkpoint_dir), self._reset_pattern, 2):
+            try:
+                old_file.unlink()
+                logging.debug(f"Removed old reset backup: {old_file}")
+            except OSError as e:
+                logging.warning(f"Failed to remove old reset backup {old_file}: {e}")
     
     def add_error(self, stage_index: int, stage_name: str, 
                  error_msg: str, recovered: bool = False) -> None:
@@ -294,28 +1132,25 @@ class CheckpointManager:
             error_msg: Error message
             recovered: Whether the error was recovered from
         """
+        now = int(time.time())
         error_info = {
             "stage": stage_index,
             "stage_name": stage_name,
-            "timestamp": int(time.time()),
+            "timestamp": now,
             "message": error_msg,
             "was_recovered": recovered
         }
         
-        if "errors" not in self.data:
-            self.data["errors"] = []
-        
-        self.data["errors"].append(error_info)
-        self.save()
+        self._journal({"op": "error", "error": error_info, "ts": now})
     
     def get_next_stage(self) -> int:
         """
         Get the next stage to execute.
         
         Returns:
-            Index of the next stage to run
+            Index of the next stage to run, skipping indices with no registered stage
         """
-        return self.data["current_stage"]
+        return _next_stage(self.data["current_stage"], self.data["stages_completed"], self.stage_names)
     
     def list_checkpoints(self) -> Dict[str, Any]:
         """
@@ -324,10 +1159,6 @@ class CheckpointManager:
         Returns:
             Dictionary with checkpoint information
         """
-        # Get all backup files for this checkpoint
-        backup_pattern = f"{self.checkpoint_path.stem}_backup_*.json"
-        backup_files = list(self.checkpoint_dir.glob(backup_pattern))
-        
         # Stage information with names
         stages_completed = []
         for stage_idx in self.data["stages_completed"]:
@@ -335,16 +1166,17 @@ class CheckpointManager:
             stages_completed.append(f"{stage_idx} ({stage_name})")
         
         # Current checkpoint summary
+        next_stage = self.get_next_stage()
         summary = {
             "video_path": self.data.get("video_path", "unknown"),
             "checkpoint_file": self.checkpoint_file,
-            "current_stage": self.data["current_stage"],
-            "current_stage_name": self.get_stage_name(self.data["current_stage"]),
+            "current_stage": next_stage,
+            "current_stage_name": self.get_stage_name(next_stage),
             "stages_completed": stages_completed,
             "start_time": self.data["metadata"]["start_time"],
             "last_updated": self.data["metadata"]["last_updated"],
             "error_count": len(self.data.get("errors", [])),
-            "backup_files": [f.name for f in backup_files]
+            "backup_files": [f.name for f in self._backup_files]
         }
         
         return summary
@@ -367,42 +1199,48 @@ class CheckpointManager:
         checkpoints = []
         
         # Find all checkpoint files, but exclude backup and reset files
-        for checkpoint_file in checkpoint_dir_path.glob("checkpoint_*.json"):
+        for entry in _scan_dir(checkpoint_dir_path):
+            if not entry.name.startswith("checkpoint_"):
+                continue
+            checkpoint_file = Path(entry.path)
+            if checkpoint_file.suffix not in _FORMAT_BY_SUFFIX:
+                continue  # Skip journals and temp files
             if '_backup_' in checkpoint_file.name or '_reset_' in checkpoint_file.name:
                 continue  # Skip backup files
+            if checkpoint_file.suffix == ".msgpack" and msgpack is None:
+                continue  # Can't be read without msgpack
             
             try:
-                with open(checkpoint_file, 'r') as f:
-                    data = json.load(f)
+                data = _load_summary(checkpoint_file)
                 
                 # Get stage names
-                stage_names = data.get("stage_names", {})
+                stage_names = data["stage_names"]
                 
                 # Format completed stages with names
                 formatted_stages = []
-                for stage_idx in data.get("stages_completed", []):
+                for stage_idx in data["stages_completed"]:
                     stage_info = stage_names.get(str(stage_idx), {})
                     stage_name = stage_info.get("name", f"Stage {stage_idx}")
                     formatted_stages.append(f"{stage_idx} ({stage_name})")
                 
                 # Get current stage name
-                current_stage = data.get("current_stage", 0)
+                current_stage = _next_stage(data["current_stage"], data["stages_completed"], stage_names)
                 current_stage_info = stage_names.get(str(current_stage), {})
                 current_stage_name = current_stage_info.get("name", f"Stage {current_stage}")
                 
                 # Extract basic information
                 checkpoint_info = {
                     "file": checkpoint_file.name,
-                    "video_path": data.get("video_path", "unknown"),
+                    "video_path": data["video_path"],
                     "current_stage": current_stage,
                     "current_stage_name": current_stage_name,
                     "stages_completed": formatted_stages,
-                    "raw_stages_completed": data.get("stages_completed", []),
-                    "last_updated": data.get("metadata", {}).get("last_updated", 0)
+                    "raw_stages_completed": data["stages_completed"],
+                    "last_updated": data["last_updated"]
                 }
                 
                 checkpoints.append(checkpoint_info)
-            except (json.JSONDecodeError, IOError):
+            except (ValueError, IOError):
                 # Skip invalid checkpoint files
                 continue
         
@@ -412,7 +1250,7 @@ class CheckpointManager:
         return checkpoints
     
     @classmethod
-    def cleanup_all_backups(cls, checkpoint_dir: str = "./checkpoints", max_backups_per_file: int = 5):
+    def cleanup_all_backups(cls, checkpoint_dir: str = "./checkpoints", max_backups_per_file: int = 5) -> None:
         """
         Clean up backup files across the entire checkpoint directory.
         
@@ -424,43 +1262,51 @@ class CheckpointManager:
         if not checkpoint_dir_path.exists():
             return
         
+        # Scan the directory once; backups are matched against this listing
+        entries = _scan_dir(checkpoint_dir_path)
+        
         # Find all main checkpoint files
         main_checkpoints = []
-        for checkpoint_file in checkpoint_dir_path.glob("checkpoint_*.json"):
+        for entry in entries:
+            checkpoint_file = Path(entry.name)
+            if not entry.name.startswith("checkpoint_") or checkpoint_file.suffix not in _FORMAT_BY_SUFFIX:
+                continue
             if '_backup_' not in checkpoint_file.name and '_reset_' not in checkpoint_file.name:
-                main_checkpoints.append(checkpoint_file.stem)
+                main_checkpoints.append((checkpoint_file.stem, checkpoint_file.suffix))
         
         # Clean up backups for each main checkpoint
-        for checkpoint_stem in main_checkpoints:
-            backup_pattern = f"{checkpoint_stem}_backup_*.json"
-            backup_files = sorted(
-                checkpoint_dir_path.glob(backup_pattern),
-                key=lambda f: f.stat().st_mtime,
-                reverse=True
-            )
+        for checkpoint_stem, suffix in main_checkpoints:
+            fmt = _FORMAT_BY_SUFFIX[suffix]
+            backup_pattern = f"{checkpoint_stem}_backup_*{suffix}"
             
             # Keep only the most recent backups
-            if len(backup_files) > max_backups_per_file:
-                for old_file in backup_files[max_backups_per_file:]:
-                    try:
-                        old_file.unlink()
-                        logging.debug(f"Removed old backup: {old_file}")
-                    except OSError as e:
-                        logging.warning(f"Failed to remove old backup {old_file}: {e}")
+            for old_file in _files_to_prune(entries, backup_pattern, max_backups_per_file):
+                try:
+                    old_file.unlink()
+                    logging.debug(f"Removed old backup: {old_file}")
+                except OSError as e:
+                    logging.warning(f"Failed to remove old backup {old_file}: {e}")
             
             # Also clean up reset backups
-            reset_pattern = f"{checkpoint_stem}_reset_*.json"
-            reset_files = sorted(
-                checkpoint_dir_path.glob(reset_pattern),
-                key=lambda f: f.stat().st_mtime,
-                reverse=True
-            )
+            reset_pattern = f"{checkpoint_stem}_reset_*{suffix}"
             
             # Keep only the 2 most recent reset backups
-            if len(reset_files) > 2:
-                for old_file in reset_files[2:]:
-                    try:
-                        old_file.unlink()
-                        logging.debug(f"Removed old reset backup: {old_file}")
-                    except OSError as e:
-                        logging.warning(f"Failed to remove old reset backup {old_file}: {e}") 
\ No newline at end of file
+            for old_file in _files_to_prune(entries, reset_pattern, 2):
+                try:
+                    old_file.unlink()
+                    logging.debug(f"Removed old reset backup: {old_file}")
+                except OSError as e:
+                    logging.warning(f"Failed to remove old reset backup {old_file}: {e}") 
+            
+            # Then the stage files that only the removed backups referred to
+            if fmt == "msgpack" and msgpack is None:
+                continue
+            try:
+                with open(checkpoint_dir_path / f"{checkpoint_stem}{suffix}", 'rb') as f:
+                    data = _decode(f.read(), fmt)
+                _replay_journal(data, checkpoint_dir_path / f"{checkpoint_stem}.jnl", fmt)
+            except (ValueError, IOError):
+                continue
+            _prune_stage_files(checkpoint_dir_path, checkpoint_stem, suffix, fmt,
+                               set(data.get("stage_files", {}).values()),
+                               data["metadata"].get("journal_seq", 0))
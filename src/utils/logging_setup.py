@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Logging configuration that moves record formatting and I/O off the calling thread.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+from typing import Optional
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(level: int = logging.INFO,
+                  fmt: str = '%(asctime)s - %(name)s - %(levelname)s - %(message)s') -> logging.Logger:
+    """
+    Configure the root logger to enqueue records for a background listener thread.
+    
+    Worker threads only put records on a queue; a QueueListener formats them and
+    writes them to stderr. Calling this more than once is a no-op.
+    
+    Args:
+        level: Root logging level
+        fmt: Format string for the stderr handler
+        
+    Returns:
+        The configured root logger
+    """
+    global _listener
+    
+    root = logging.getLogger()
+    if _listener is not None:
+        return root
+    
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter(fmt))
+    
+    log_queue: queue.Queue = queue.Queue(-1)
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(level)
+    
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    # Flush queued records on interpreter exit
+    atexit.register(_listener.stop)
+    
+    return root
@@ -3,12 +3,202 @@ Report generation for video analysis results.
 """
 
 import os
-import json
+import sys
+import base64
 import webbrowser
 import subprocess
 import shutil
 from pathlib import Path
 
+from src.tools.video_utils import extract_video_metadata
+
+
+# Static <head> (styles) and page title of the HTML report
+_REPORT_HEADER = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Video Analysis Report</title>
+    <style>
+        body {
+            font-family: Arial, sans-serif;
+            line-height: 1.6;
+            margin: 0;
+            padding: 20px;
+            color: #333;
+            max-width: 1200px;
+            margin: 0 auto;
+        }
+        h1, h2, h3 {
+            color: #2c3e50;
+        }
+        .metadata {
+            background-color: #f8f9fa;
+            padding: 15px;
+            border-radius: 5px;
+            margin-bottom: 20px;
+        }
+        .metadata-item {
+            margin-bottom: 5px;
+        }
+        .timeline-container {
+            margin: 30px 0;
+        }
+        .timeline {
+            position: relative;
+            height: 70px;
+            background-color: #f8f9fa;
+            border-radius: 5px;
+            padding: 10px;
+        }
+        .timeline-track {
+            position: absolute;
+            top: 35px;
+            left: 0;
+            right: 0;
+            height: 4px;
+            background-color: #ddd;
+        }
+        .time-marker {
+            position: absolute;
+            top: 0;
+            height: 70px;
+        }
+        .marker-line {
+            position: absolute;
+            top: 20px;
+            height: 15px;
+            width: 1px;
+            background-color: #999;
+        }
+        .marker-time {
+            position: absolute;
+            top: 40px;
+            transform: translateX(-50%);
+            font-size: 12px;
+            color: #666;
+        }
+        .moment-marker {
+            position: absolute;
+            height: 20px;
+            top: 27px;
+            border-radius: 3px;
+            cursor: pointer;
+        }
+        .moment-label {
+            display: inline-block;
+            background-color: rgba(255, 255, 255, 0.7);
+            border-radius: 50%;
+            width: 20px;
+            height: 20px;
+            text-align: center;
+            line-height: 20px;
+            font-size: 12px;
+            font-weight: bold;
+        }
+        .moments-container {
+            display: grid;
+            grid-template-columns: repeat(auto-fill, minmax(300px, 1fr));
+            gap: 20px;
+        }
+        .moment-card {
+            border: 1px solid #ddd;
+            border-radius: 5px;
+            overflow: hidden;
+        }
+        .selected-moment-card {
+            border: 2px solid #4caf50;
+            background-color: #f1f8e9;
+        }
+        .moment-thumb {
+            width: 100%;
+            height: 180px;
+            object-fit: cover;
+        }
+        .moment-info {
+            padding: 15px;
+        }
+        .moment-time {
+            color: #666;
+            font-size: 14px;
+            margin-bottom: 5px;
+        }
+        .moment-desc {
+            margin: 0;
+        }
+        .badge {
+            display: inline-block;
+            padding: 3px 7px;
+            border-radius: 12px;
+            font-size: 12px;
+            font-weight: bold;
+            margin-right: 5px;
+            margin-bottom: 5px;
+            background-color: #e0e0e0;
+        }
+        .badge-platform {
+            background-color: #bbdefb;
+            color: #1565c0;
+        }
+        .badge-category {
+            background-color: #c8e6c9;
+            color: #2e7d32;
+        }
+        .engagement-score {
+            display: inline-block;
+            width: 100%;
+            height: 6px;
+            background-color: #eee;
+            border-radius: 3px;
+            margin: 8px 0;
+            position: relative;
+        }
+        .engagement-score-bar {
+            height: 100%;
+            border-radius: 3px;
+            background: linear-gradient(90deg, #f44336, #ffeb3b, #4caf50);
+        }
+        .reason-section {
+            font-style: italic;
+            color: #555;
+            margin: 8px 0;
+            font-size: 14px;
+        }
+        .tabs {
+            display: flex;
+            margin-bottom: 20px;
+        }
+        .tab {
+            padding: 10px 20px;
+            cursor: pointer;
+            background-color: #f1f1f1;
+            border: 1px solid #ddd;
+            border-bottom: none;
+            margin-right: 5px;
+            border-radius: 5px 5px 0 0;
+        }
+        .tab.active {
+            background-color: #fff;
+            border-bottom: 1px solid #fff;
+            margin-bottom: -1px;
+            font-weight: bold;
+        }
+        .tab-content {
+            display: none;
+            border: 1px solid #ddd;
+            padding: 20px;
+            border-radius: 0 5px 5px 5px;
+        }
+        .tab-content.active {
+            display: block;
+        }
+    </style>
+</head>
+<body>
+    <h1>Video Analysis Report</h1>
+    
+"""
 
 def extract_thumbnails(video_path, moments, output_dir="output/thumbnails"):
     """
@@ -55,54 +245,135 @@ def extract_thumbnails(video_path, moments, output_dir="output/thumbnails"):
     return thumbnails
 
 
+def _split_jpegs(stream):
+    """
+    Split a concatenated MJPEG byte stream into individual JPEG images.
+    
+    Args:
+        stream: Bytes of consecutive JPEGs, each from an SOI (FF D8) to an EOI (FF D9) marker
+        
+    Returns:
+        List of JPEG images as bytes
+    """
+    images = []
+    start = stream.find(b"\xff\xd8")
+    while start != -1:
+        end = stream.find(b"\xff\xd9", start + 2)
+        if end == -1:
+            break
+        images.append(bytes(stream[start:end + 2]))
+        start = stream.find(b"\xff\xd8", end + 2)
+    return images
+
+
+def extract_thumbnail_images(video_path, moments, width=320):
+    """
+    Extract thumbnails for each moment into memory, without writing any files.
+    
+    A single FFmpeg invocation seeks to every moment, scales each frame and
+    streams them to stdout as MJPEG, which is split back into one JPEG per moment.
+    
+    Args:
+        video_path: Path to the video file
+        moments: List of VideoMoment objects
+        width: Thumbnail width in pixels; the height keeps the aspect ratio
+        
+    Returns:
+        Dictionary mapping moment index to JPEG bytes, empty if extraction failed
+    """
+    if not moments:
+        return {}
+    
+    cmd = ["ffmpeg"]
+    for moment in moments:
+        cmd += ["-ss", str(moment.start_time), "-i", str(video_path)]
+    # Take the first frame of each input, scale it, and concatenate them into one stream
+    filters = [
+        f"[{i}:v:0]trim=end_frame=1,setpts=PTS-STARTPTS,scale={width}:-2[v{i}]"
+        for i in range(len(moments))
+    ]
+    labels = "".join(f"[v{i}]" for i in range(len(moments)))
+    filters.append(f"{labels}concat=n={len(moments)}:v=1:a=0[out]")
+    cmd += [
+        "-filter_complex", ";".join(filters),
+        "-map", "[out]",
+        "-f", "image2pipe", "-c:v", "mjpeg", "-q:v", "2",
+        "-"
+    ]
+    
+    try:
+        result = subprocess.run(cmd, check=True, capture_output=True)
+    except subprocess.CalledProcessError as e:
+        print(f"Error extracting thumbnails: {e}")
+        return {}
+    
+    images = _split_jpegs(result.stdout)
+    if len(images) != len(moments):
+        # A moment past the end of the video yields no frame, so indices can't be matched up
+        print(f"Error extracting thumbnails: expected {len(moments)} frames, got {len(images)}")
+        return {}
+    return dict(enumerate(images))
+
+
 def get_video_metadata(video_path):
     """
     Get basic metadata about the video file.
     
+    Delegates to video_utils.extract_video_metadata, which memoizes results per
+    (path, mtime, size), so repeated reports on an unchanged video do not re-probe.
+    
     Args:
         video_path: Path to the video file
         
     Returns:
-        Dictionary containing video metadata
+        Dictionary containing video metadata, or an empty dict if probing fails
     """
     try:
-        cmd = [
-            "ffprobe", 
-            "-v", "quiet", 
-            "-print_format", "json", 
-            "-show_format", 
-            "-show_streams", 
-            str(video_path)
-        ]
-        
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-        data = json.loads(result.stdout)
-        
-        # Extract relevant metadata
-        metadata = {}
-        if "format" in data:
-            metadata["duration"] = float(data["format"].get("duration", 0))
-            metadata["size"] = int(data["format"].get("size", 0))
-            metadata["bitrate"] = int(data["format"].get("bit_rate", 0))
-            
-        # Find video stream
-        video_stream = None
-        for stream in data.get("streams", []):
-            if stream.get("codec_type") == "video":
-                video_stream = stream
-                break
-                
-        if video_stream:
-            metadata["width"] = video_stream.get("width", 0)
-            metadata["height"] = video_stream.get("height", 0)
-            metadata["framerate"] = eval(video_stream.get("r_frame_rate", "0/1"))
-            
-        return metadata
-    except (subprocess.CalledProcessError, json.JSONDecodeError, ValueError) as e:
+        return _report_metadata(extract_video_metadata(video_path))
+    except (ValueError, OSError) as e:
         print(f"Error getting video metadata: {e}")
         return {}
 
 
+def _report_metadata(video_metadata):
+    """
+    Convert metadata from video_utils.extract_video_metadata to the fields shown in the report.
+    
+    Args:
+        video_metadata: Dictionary with duration, dimensions, framerate and size
+        
+    Returns:
+        Dictionary in the format returned by get_video_metadata
+    """
+    width, height = video_metadata.get("dimensions") or (0, 0)
+    return {
+        "duration": video_metadata.get("duration", 0),
+        "size": video_metadata.get("size", 0),
+        "width": width,
+        "height": height,
+        "framerate": video_metadata.get("framerate", 0),
+    }
+
+
+def _link_or_copy(src_path, dest_path):
+    """
+    Hardlink src_path to dest_path, copying instead when linking isn't possible.
+    
+    Args:
+        src_path: Existing file
+        dest_path: Path to create; replaced if it already exists
+    """
+    try:
+        dest_path.unlink()
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(src_path, dest_path)
+    except OSError:
+        # Different filesystem or no hardlink support
+        shutil.copy2(src_path, dest_path)
+
+
 def generate_timeline_html(metadata, moments):
     """
     Generate HTML for a visual timeline of the video.
@@ -120,64 +391,74 @@ def generate_timeline_html(metadata, moments):
         return "<p>Timeline unavailable: Invalid video duration</p>"
     
     # Generate timeline HTML
-    html = """
+    parts = ["""
     <div class="timeline-container">
         <div class="timeline">
             <div class="timeline-track"></div>
-    """
+    """]
+    
+    # Percent of the timeline per second
+    percent_per_second = 100.0 / duration
     
     # Add time markers
     marker_interval = max(int(duration / 10), 1)  # Create ~10 markers
     for i in range(0, int(duration) + 1, marker_interval):
-        position = (i / duration) * 100
+        position = i * percent_per_second
         mins = i // 60
         secs = i % 60
-        html += f"""
+        parts.append(f"""
         <div class="time-marker" style="left: {position}%;">
             <div class="marker-line"></div>
             <div class="marker-time">{mins:02d}:{secs:02d}</div>
         </div>
-        """
+        """)
+    
+    # Moments in a list share a type, so the score check is done once
+    has_score = bool(moments) and hasattr(moments[0], "engagement_score")
     
     # Add moments
     for i, moment in enumerate(moments):
-        start_pos = (moment.start_time / duration) * 100
-        end_pos = (moment.end_time / duration) * 100
+        start_pos = moment.start_time * percent_per_second
+        end_pos = moment.end_time * percent_per_second
         width = end_pos - start_pos
         
         # Use engagement score to determine color (red to green)
         color = "hsl(120, 70%, 60%)"  # Default to green
-        if hasattr(moment, "engagement_score"):
+        if has_score:
             # Map 0-1 to hue 0-120 (red to green)
             hue = int(moment.engagement_score * 120)
             color = f"hsl({hue}, 70%, 60%)"
         
-        html += f"""
+        parts.append(f"""
         <div class="moment-marker" style="left: {start_pos}%; width: {width}%; background-color: {color};" 
              title="Moment {i+1}: {moment.description}">
             <span class="moment-label">{i+1}</span>
         </div>
-        """
+        """)
     
-    html += """
+    parts.append("""
         </div>
     </div>
-    """
+    """)
     
-    return html
+    return "".join(parts)
 
 
-def generate_html_report(video_path, result, thumbnails=None):
+def generate_html_report(video_path, result, thumbnails=None, standalone=False, return_html=True):
     """
     Generate an HTML report of the analysis results.
     
     Args:
         video_path: Path to the video file
         result: Result dictionary from the analysis pipeline
-        thumbnails: Dictionary mapping moment index to thumbnail path
+        thumbnails: Dictionary mapping moment index to thumbnail path, or to JPEG
+            bytes from extract_thumbnail_images, which are embedded as data URIs
+        standalone: Whether to place the thumbnails in the report directory so it
+            can be moved on its own; otherwise the report references them in place
+        return_html: Whether to also return the HTML as a single string
         
     Returns:
-        Tuple of (report_path, html_content)
+        Tuple of (report_path, html_content), with html_content None if return_html is False
     """
     if thumbnails is None:
         thumbnails = {}
@@ -186,20 +467,23 @@ def generate_html_report(video_path, result, thumbnails=None):
     output_dir = Path("output/report")
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    # Copy thumbnails to report directory
-    report_images_dir = output_dir / "images"
-    report_images_dir.mkdir(exist_ok=True)
-    
-    # Update thumbnail paths to be relative to the report
+    # Embed in-memory thumbnails and make thumbnail paths relative to the report
     report_thumbnails = {}
+    report_images_dir = output_dir / "images"
     for idx, path in thumbnails.items():
-        src_path = Path(path)
-        dest_path = report_images_dir / src_path.name
-        shutil.copy2(src_path, dest_path)
-        report_thumbnails[idx] = f"images/{src_path.name}"
-    
-    # Get video metadata
-    metadata = get_video_metadata(video_path)
+        if isinstance(path, bytes):
+            report_thumbnails[idx] = f"data:image/jpeg;base64,{base64.b64encode(path).decode('ascii')}"
+        elif standalone:
+            src_path = Path(path)
+            report_images_dir.mkdir(exist_ok=True)
+            _link_or_copy(src_path, report_images_dir / src_path.name)
+            report_thumbnails[idx] = f"images/{src_path.name}"
+        else:
+            report_thumbnails[idx] = Path(os.path.relpath(path, output_dir)).as_posix()
+    
+    # Get video metadata, reusing the pipeline's probe when it has one
+    video_metadata = result.get("video_metadata")
+    metadata = _report_metadata(video_metadata) if video_metadata else get_video_metadata(video_path)
     
     # Generate HTML report
     moments = result.get("moments", [])
@@ -209,195 +493,11 @@ def generate_html_report(video_path, result, thumbnails=None):
     if selected_moments is None:
         selected_moments = []
     
-    html = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Video Analysis Report</title>
-    <style>
-        body {{
-            font-family: Arial, sans-serif;
-            line-height: 1.6;
-            margin: 0;
-            padding: 20px;
-            color: #333;
-            max-width: 1200px;
-            margin: 0 auto;
-        }}
-        h1, h2, h3 {{
-            color: #2c3e50;
-        }}
-        .metadata {{
-            background-color: #f8f9fa;
-            padding: 15px;
-            border-radius: 5px;
-            margin-bottom: 20px;
-        }}
-        .metadata-item {{
-            margin-bottom: 5px;
-        }}
-        .timeline-container {{
-            margin: 30px 0;
-        }}
-        .timeline {{
-            position: relative;
-            height: 70px;
-            background-color: #f8f9fa;
-            border-radius: 5px;
-            padding: 10px;
-        }}
-        .timeline-track {{
-            position: absolute;
-            top: 35px;
-            left: 0;
-            right: 0;
-            height: 4px;
-            background-color: #ddd;
-        }}
-        .time-marker {{
-            position: absolute;
-            top: 0;
-            height: 70px;
-        }}
-        .marker-line {{
-            position: absolute;
-            top: 20px;
-            height: 15px;
-            width: 1px;
-            background-color: #999;
-        }}
-        .marker-time {{
-            position: absolute;
-            top: 40px;
-            transform: translateX(-50%);
-            font-size: 12px;
-            color: #666;
-        }}
-        .moment-marker {{
-            position: absolute;
-            height: 20px;
-            top: 27px;
-            border-radius: 3px;
-            cursor: pointer;
-        }}
-        .moment-label {{
-            display: inline-block;
-            background-color: rgba(255, 255, 255, 0.7);
-            border-radius: 50%;
-            width: 20px;
-            height: 20px;
-            text-align: center;
-            line-height: 20px;
-            font-size: 12px;
-            font-weight: bold;
-        }}
-        .moments-container {{
-            display: grid;
-            grid-template-columns: repeat(auto-fill, minmax(300px, 1fr));
-            gap: 20px;
-        }}
-        .moment-card {{
-            border: 1px solid #ddd;
-            border-radius: 5px;
-            overflow: hidden;
-        }}
-        .selected-moment-card {{
-            border: 2px solid #4caf50;
-            background-color: #f1f8e9;
-        }}
-        .moment-thumb {{
-            width: 100%;
-            height: 180px;
-            object-fit: cover;
-        }}
-        .moment-info {{
-            padding: 15px;
-        }}
-        .moment-time {{
-            color: #666;
-            font-size: 14px;
-            margin-bottom: 5px;
-        }}
-        .moment-desc {{
-            margin: 0;
-        }}
-        .badge {{
-            display: inline-block;
-            padding: 3px 7px;
-            border-radius: 12px;
-            font-size: 12px;
-            font-weight: bold;
-            margin-right: 5px;
-            margin-bottom: 5px;
-            background-color: #e0e0e0;
-        }}
-        .badge-platform {{
-            background-color: #bbdefb;
-            color: #1565c0;
-        }}
-        .badge-category {{
-            background-color: #c8e6c9;
-            color: #2e7d32;
-        }}
-        .engagement-score {{
-            display: inline-block;
-            width: 100%;
-            height: 6px;
-            background-color: #eee;
-            border-radius: 3px;
-            margin: 8px 0;
-            position: relative;
-        }}
-        .engagement-score-bar {{
-            height: 100%;
-            border-radius: 3px;
-            background: linear-gradient(90deg, #f44336, #ffeb3b, #4caf50);
-        }}
-        .reason-section {{
-            font-style: italic;
-            color: #555;
-            margin: 8px 0;
-            font-size: 14px;
-        }}
-        .tabs {{
-            display: flex;
-            margin-bottom: 20px;
-        }}
-        .tab {{
-            padding: 10px 20px;
-            cursor: pointer;
-            background-color: #f1f1f1;
-            border: 1px solid #ddd;
-            border-bottom: none;
-            margin-right: 5px;
-            border-radius: 5px 5px 0 0;
-        }}
-        .tab.active {{
-            background-color: #fff;
-            border-bottom: 1px solid #fff;
-            margin-bottom: -1px;
-            font-weight: bold;
-        }}
-        .tab-content {{
-            display: none;
-            border: 1px solid #ddd;
-            padding: 20px;
-            border-radius: 0 5px 5px 5px;
-        }}
-        .tab-content.active {{
-            display: block;
-        }}
-    </style>
-</head>
-<body>
-    <h1>Video Analysis Report</h1>
-    
-    <div class="metadata">
+    parts = [_REPORT_HEADER, f"""    <div class="metadata">
         <h2>Video Metadata</h2>
         <div class="metadata-item"><strong>Filename:</strong> {Path(video_path).name}</div>
         <div class="metadata-item"><strong>Duration:</strong> {int(metadata.get("duration", 0) // 60)}m {int(metadata.get("duration", 0) % 60)}s</div>
-        <div class="metadata-item"><strong>Resolution:</strong> {metadata.get("width", 0)}×{metadata.get("height", 0)}</div>
+        <div class="metadata-item"><strong>Resolution:</strong> {metadata.get("width", 0)}&times;{metadata.get("height", 0)}</div>
         <div class="metadata-item"><strong>File Size:</strong> {metadata.get("size", 0) // (1024*1024)} MB</div>
         <div class="metadata-item"><strong>Framerate:</strong> {metadata.get("framerate", 0):.2f} fps</div>
     </div>
@@ -412,20 +512,18 @@ def generate_html_report(video_path, result, thumbnails=None):
     
     <div id="all-moments" class="tab-content active">
         <div class="moments-container">
-    """
+    """]
     
     # Add moment cards for all identified moments
     for i, moment in enumerate(moments):
         thumb_path = report_thumbnails.get(i, "")
         thumb_html = f'<img src="{thumb_path}" class="moment-thumb" alt="Moment {i+1}">' if thumb_path else ""
         
-        start_mins = int(moment.start_time // 60)
-        start_secs = int(moment.start_time % 60)
-        end_mins = int(moment.end_time // 60)
-        end_secs = int(moment.end_time % 60)
+        start_mins, start_secs = divmod(int(moment.start_time), 60)
+        end_mins, end_secs = divmod(int(moment.end_time), 60)
         duration = moment.end_time - moment.start_time
         
-        html += f"""
+        parts.append(f"""
         <div class="moment-card">
             {thumb_html}
             <div class="moment-info">
@@ -436,15 +534,15 @@ def generate_html_report(video_path, result, thumbnails=None):
                 <p class="moment-desc">{moment.description}</p>
             </div>
         </div>
-        """
+        """)
     
-    html += """
+    parts.append("""
         </div>
     </div>
     
     <div id="selected-moments" class="tab-content">
         <div class="moments-container">
-    """
+    """)
     
     # Add moment cards for selected moments with additional metadata
     for i, moment in enumerate(selected_moments):
@@ -456,10 +554,8 @@ def generate_html_report(video_path, result, thumbnails=None):
         thumb_path = report_thumbnails.get(matching_moment_idx, "") if matching_moment_idx is not None else ""
         thumb_html = f'<img src="{thumb_path}" class="moment-thumb" alt="Selected Moment {i+1}">' if thumb_path else ""
         
-        start_mins = int(moment.start_time // 60)
-        start_secs = int(moment.start_time % 60)
-        end_mins = int(moment.end_time // 60)
-        end_secs = int(moment.end_time % 60)
+        start_mins, start_secs = divmod(int(moment.start_time), 60)
+        end_mins, end_secs = divmod(int(moment.end_time), 60)
         duration = moment.end_time - moment.start_time
         
         # Platform badges
@@ -476,7 +572,7 @@ def generate_html_report(video_path, result, thumbnails=None):
         <div style="text-align: right; font-size: 12px;">Engagement: {moment.engagement_prediction:.2f}</div>
         """
         
-        html += f"""
+        parts.append(f"""
         <div class="moment-card selected-moment-card">
             {thumb_html}
             <div class="moment-info">
@@ -493,9 +589,9 @@ def generate_html_report(video_path, result, thumbnails=None):
                 </div>
             </div>
         </div>
-        """
+        """)
     
-    html += """
+    parts.append("""
         </div>
     </div>
     
@@ -518,31 +614,57 @@ def generate_html_report(video_path, result, thumbnails=None):
     </script>
 </body>
 </html>
-    """
+    """)
     
     # Write HTML to file
     report_path = output_dir / "analysis_report.html"
-    with open(report_path, "w") as f:
-        f.write(html)
+    # UTF-8 regardless of locale, matching the meta charset; the large buffer makes it one write
+    with open(report_path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        f.writelines(parts)
+    
+    return str(report_path), "".join(parts) if return_html else None
+
+
+def _open_in_browser(path):
+    """
+    Open a file with the desktop's default handler without waiting for it.
     
-    return str(report_path), html
+    Args:
+        path: Path to the file to open
+    """
+    path = Path(path).absolute()
+    if sys.platform == "win32":
+        os.startfile(path)
+        return
+    
+    opener = "open" if sys.platform == "darwin" else "xdg-open"
+    try:
+        subprocess.Popen([opener, str(path)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                         start_new_session=True)
+    except FileNotFoundError:
+        # No desktop opener installed; let webbrowser find a browser instead
+        webbrowser.open(f"file://{path}")
 
 
-def display_analysis_results(video_path, result, thumbnails=None):
+def display_analysis_results(video_path, result, thumbnails=None, standalone=False, open_browser=True):
     """
     Create an HTML report of the analysis results and open it in a browser.
     
     Args:
         video_path: Path to the video file
         result: Result dictionary from the analysis pipeline
-        thumbnails: Dictionary mapping moment index to thumbnail path
+        thumbnails: Dictionary mapping moment index to thumbnail path or JPEG bytes
+        standalone: Whether to place the thumbnails in the report directory
+        open_browser: Whether to open the report; the browser is launched without blocking
         
     Returns:
         Path to the generated report
     """
-    report_path, _ = generate_html_report(video_path, result, thumbnails)
+    report_path, _ = generate_html_report(video_path, result, thumbnails, standalone,
+                                          return_html=False)
     
     # Open in browser
-    webbrowser.open(f"file://{Path(report_path).absolute()}")
+    if open_browser:
+        _open_in_browser(report_path)
     
     return report_path 
\ No newline at end of file
@@ -5,8 +5,11 @@ Combines the basic and checkpointed pipeline functionality.
 """
 
 import sys
+import asyncio
 import logging
 import time
+import functools
+import threading
 from typing import Dict, Any, List, Callable, TypedDict, Optional, Tuple
 from pathlib import Path
 
@@ -19,6 +22,7 @@ from src.agents.video_analysis import video_analysis_agent
 from src.agents.moment_selection import moment_selection_agent
 from src.utils.checkpoint_manager import CheckpointManager
 from src.models.state import VideoMoment, SelectedMoment
+from src.tools.video_utils import extract_video_metadata
 
 # Define pipeline stage type
 class PipelineStage:
@@ -41,6 +45,7 @@ class PipelineState(TypedDict):
     error: Optional[str]
     frames_extracted: Optional[List[str]]
     analysis_results: Optional[Dict[str, Any]]
+    video_metadata: Optional[Dict[str, Any]]
     report_path: Optional[str]
 
 # Pipeline stage definitions
@@ -49,10 +54,80 @@ STAGE_ANALYZE_FRAMES = 1
 STAGE_DETECT_MOMENTS = 2
 STAGE_GENERATE_REPORT = 3
 
+# Extracted frames are named by index, so checkpoints store this pattern and a count
+FRAME_NAME_PATTERN = "frame_{}.jpg"
+
+# Frames sampled per second of video
+FRAME_SAMPLE_FPS = 1.0
+
+# Maximum LangGraph analyses (and so Gemini requests) in flight across all pipeline runs
+MAX_CONCURRENT_ANALYSES = 2
+
+# Held for the duration of each analysis
+_ANALYSIS_SLOTS = threading.BoundedSemaphore(MAX_CONCURRENT_ANALYSES)
+
+def _moments_to_columns(moments: List[Any]) -> Dict[str, List[Any]]:
+    """
+    Convert a list of moments to a columnar dict (one list per field) for checkpoint stage data.
+    
+    Field names are stored once instead of once per moment, and each column is a flat list.
+    
+    Args:
+        moments: VideoMoment or SelectedMoment objects
+        
+    Returns:
+        Dictionary mapping each field name to the list of that field's values
+    """
+    if not moments:
+        return {}
+    return {name: [vars(m)[name] for m in moments] for name in vars(moments[0])}
+
+def _moments_from_columns(data: Any, moment_type: type) -> List[Any]:
+    """
+    Rebuild moments from checkpoint stage data.
+    
+    Accepts the columnar form written by _moments_to_columns, as well as the
+    list-of-dicts form written by older checkpoints.
+    
+    Args:
+        data: Columnar dict or list of per-moment dicts
+        moment_type: VideoMoment or SelectedMoment
+        
+    Returns:
+        List of moment_type objects
+    """
+    if isinstance(data, dict):
+        names = list(data)
+        return [moment_type(**dict(zip(names, values))) for values in zip(*data.values())]
+    return [moment_type(**m) for m in data]
+
+def _frames_from_stage_data(stage_data: Optional[Dict[str, Any]]) -> Optional[List[str]]:
+    """
+    Rebuild the extracted frame names from extract_frames stage data.
+    
+    Accepts the pattern-and-count form written by extract_frames, as well as the
+    explicit name list written by older checkpoints.
+    
+    Args:
+        stage_data: Stage data of the extract_frames stage, if any
+        
+    Returns:
+        List of frame names, or None if the stage data has no frames
+    """
+    if not stage_data:
+        return None
+    if "frame_count" in stage_data:
+        pattern = stage_data.get("frame_pattern", FRAME_NAME_PATTERN)
+        return [pattern.format(i) for i in range(stage_data["frame_count"])]
+    return stage_data.get("frames")
+
 def create_pipeline(use_langgraph: bool = False) -> List[PipelineStage]:
     """
     Create a pipeline with predefined stages.
     
+    The LangGraph analysis also selects the moments, so with use_langgraph the
+    detect_moments stage is left out entirely; stage indices stay the same.
+    
     Args:
         use_langgraph: Whether to use LangGraph for the analysis stage
         
@@ -66,29 +141,28 @@ def create_pipeline(use_langgraph: bool = False) -> List[PipelineStage]:
         PipelineStage(STAGE_ANALYZE_FRAMES, "analyze_frames", 
                      analyze_frames_langgraph if use_langgraph else analyze_frames,
                      "Analyze extracted frames"),
-        PipelineStage(STAGE_DETECT_MOMENTS, "detect_moments", detect_moments,
-                     "Detect interesting moments from analysis"),
         PipelineStage(STAGE_GENERATE_REPORT, "generate_report", generate_report,
                      "Generate final analysis report")
     ]
+    if not use_langgraph:
+        stages.insert(2, PipelineStage(STAGE_DETECT_MOMENTS, "detect_moments", detect_moments,
+                                       "Detect interesting moments from analysis"))
     
     return stages
 
-def register_pipeline_stages(checkpoint_mgr: CheckpointManager) -> None:
+def register_pipeline_stages(checkpoint_mgr: CheckpointManager,
+                             stages: Optional[List[PipelineStage]] = None) -> None:
     """
-    Register all pipeline stages with the checkpoint manager.
+    Register pipeline stages with the checkpoint manager.
     
     Args:
         checkpoint_mgr: Checkpoint manager instance
+        stages: Stages to register (defaults to the full non-LangGraph pipeline)
     """
-    stages = [
-        (STAGE_EXTRACT_FRAMES, "extract_frames", "Extract key frames from video"),
-        (STAGE_ANALYZE_FRAMES, "analyze_frames", "Analyze extracted frames"),
-        (STAGE_DETECT_MOMENTS, "detect_moments", "Detect interesting moments from analysis"),
-        (STAGE_GENERATE_REPORT, "generate_report", "Generate final analysis report")
-    ]
+    if stages is None:
+        stages = create_pipeline()
     
-    checkpoint_mgr.register_stages(stages)
+    checkpoint_mgr.register_stages([(stage.index, stage.name, stage.description) for stage in stages])
 
 def extract_frames(state: PipelineState, checkpoint_mgr: CheckpointManager) -> PipelineState:
     """
@@ -103,15 +177,24 @@ def extract_frames(state: PipelineState, checkpoint_mgr: CheckpointManager) -> P
     """
     logging.info("Extracting frames from video...")
     
-    # Simulate extraction
-    time.sleep(1)
+    # No later stage reads pixel data, so the sampled frames are counted from the probed
+    # duration instead of being decoded
+    try:
+        duration = extract_video_metadata(state["video_path"])["duration"]
+        frame_count = max(1, round(duration * FRAME_SAMPLE_FPS))
+    except (ValueError, OSError) as e:
+        error_msg = f"Frame extraction failed: {e}"
+        checkpoint_mgr.add_error(STAGE_EXTRACT_FRAMES, "extract_frames", error_msg)
+        state["error"] = error_msg
+        return state
     
-    # Update state with extracted frames (simulated)
-    frames = [f"frame_{i}.jpg" for i in range(10)]
+    # Update state with the extracted frames, named by index
+    frames = [FRAME_NAME_PATTERN.format(i) for i in range(frame_count)]
     state["frames_extracted"] = frames
     
-    # Store data in checkpoint
-    stage_data = {"frames": frames}
+    # Store data in checkpoint; the names are rebuilt from the pattern, so the payload
+    # stays the same size however many frames were extracted
+    stage_data = {"frame_pattern": FRAME_NAME_PATTERN, "frame_count": frame_count}
     checkpoint_mgr.mark_stage_complete(STAGE_EXTRACT_FRAMES, "extract_frames", stage_data)
     
     return state
@@ -133,9 +216,8 @@ def analyze_frames(state: PipelineState, checkpoint_mgr: CheckpointManager) -> P
     frames = state.get("frames_extracted", [])
     if not frames:
         # Try to get from checkpoint
-        stage_data = checkpoint_mgr.get_stage_data(STAGE_EXTRACT_FRAMES)
-        if stage_data and "frames" in stage_data:
-            frames = stage_data["frames"]
+        frames = _frames_from_stage_data(checkpoint_mgr.get_stage_data(STAGE_EXTRACT_FRAMES))
+        if frames:
             state["frames_extracted"] = frames
     
     if not frames:
@@ -161,13 +243,25 @@ def analyze_frames(state: PipelineState, checkpoint_mgr: CheckpointManager) -> P
     
     return state
 
+# Held while compiling, so concurrent first calls from batch runs compile once
+_GRAPH_LOCK = threading.Lock()
+
 def create_langgraph_workflow():
     """
     Create a LangGraph workflow for video analysis.
     
+    The graph has no per-run configuration, so it is compiled once and the
+    same compiled graph is returned on every call, from any thread.
+    
     Returns:
         A compiled StateGraph for video analysis
     """
+    with _GRAPH_LOCK:
+        return _compile_langgraph_workflow()
+
+@functools.lru_cache(maxsize=None)
+def _compile_langgraph_workflow():
+    """Build and compile the analysis graph (called once, under _GRAPH_LOCK)."""
     # Create the state graph
     workflow = StateGraph(Dict)
     
@@ -200,9 +294,8 @@ def analyze_frames_langgraph(state: PipelineState, checkpoint_mgr: CheckpointMan
     frames = state.get("frames_extracted", [])
     if not frames:
         # Try to get from checkpoint
-        stage_data = checkpoint_mgr.get_stage_data(STAGE_EXTRACT_FRAMES)
-        if stage_data and "frames" in stage_data:
-            frames = stage_data["frames"]
+        frames = _frames_from_stage_data(checkpoint_mgr.get_stage_data(STAGE_EXTRACT_FRAMES))
+        if frames:
             state["frames_extracted"] = frames
     
     if not frames:
@@ -220,9 +313,11 @@ def analyze_frames_langgraph(state: PipelineState, checkpoint_mgr: CheckpointMan
         "api_key": state["api_key"]
     }
     
-    # Execute LangGraph pipeline
+    # Execute LangGraph pipeline; at most MAX_CONCURRENT_ANALYSES run at once, so batch
+    # runs queue here instead of all hitting the API together and being rate limited
     try:
-        result = pipeline.invoke(langgraph_state)
+        with _ANALYSIS_SLOTS:
+            result = pipeline.invoke(langgraph_state)
         
         # Extract moments from LangGraph result
         if "moments" in result:
@@ -251,16 +346,11 @@ def analyze_frames_langgraph(state: PipelineState, checkpoint_mgr: CheckpointMan
         # Store data in checkpoint
         stage_data = {
             "analysis_results": analysis_results,
-            "moments": [moment.__dict__ for moment in result.get("moments", [])],
-            "selected_moments": [moment.__dict__ for moment in result.get("selected_moments", [])]
+            "moments": _moments_to_columns(result.get("moments") or []),
+            "selected_moments": _moments_to_columns(result.get("selected_moments") or [])
         }
         checkpoint_mgr.mark_stage_complete(STAGE_ANALYZE_FRAMES, "analyze_frames", stage_data)
         
-        # Skip the detect_moments stage since LangGraph already did it
-        checkpoint_mgr.mark_stage_complete(STAGE_DETECT_MOMENTS, "detect_moments", 
-                                          {"moments": [m.__dict__ for m in result.get("moments", [])],
-                                           "selected_moments": [m.__dict__ for m in result.get("selected_moments", [])]})
-        
     except Exception as e:
         error_msg = f"LangGraph analysis failed: {str(e)}"
         checkpoint_mgr.add_error(STAGE_ANALYZE_FRAMES, "analyze_frames", error_msg)
@@ -317,7 +407,7 @@ def detect_moments(state: PipelineState, checkpoint_mgr: CheckpointManager) -> P
     
     # Store data in checkpoint
     stage_data = {
-        "moments": [moment.__dict__ for moment in moments]
+        "moments": _moments_to_columns(moments)
     }
     checkpoint_mgr.mark_stage_complete(STAGE_DETECT_MOMENTS, "detect_moments", stage_data)
     
@@ -339,13 +429,14 @@ def generate_report(state: PipelineState, checkpoint_mgr: CheckpointManager) ->
     # Get moments from previous stage
     moments = state.get("moments", [])
     if not moments:
-        # Try to get from checkpoint
-        stage_data = checkpoint_mgr.get_stage_data(STAGE_DETECT_MOMENTS)
-        if stage_data and "moments" in stage_data:
-            # Convert back to VideoMoment objects
-            moment_dicts = stage_data["moments"]
-            moments = [VideoMoment(**m) for m in moment_dicts]
-            state["moments"] = moments
+        # Try to get from checkpoint; LangGraph runs store them with the analysis results
+        for stage_index in (STAGE_DETECT_MOMENTS, STAGE_ANALYZE_FRAMES):
+            stage_data = checkpoint_mgr.get_stage_data(stage_index)
+            if stage_data and "moments" in stage_data:
+                # Convert back to VideoMoment objects
+                moments = _moments_from_columns(stage_data["moments"], VideoMoment)
+                state["moments"] = moments
+                break
     
     if not moments:
         error_msg = "No moments available for report generation"
@@ -361,7 +452,7 @@ def generate_report(state: PipelineState, checkpoint_mgr: CheckpointManager) ->
             # Convert back to SelectedMoment objects
             from src.models.state import SelectedMoment
             moment_dicts = stage_data["selected_moments"]
-            selected_moments = [SelectedMoment(**m) for m in moment_dicts]
+            selected_moments = _moments_from_columns(moment_dicts, SelectedMoment)
             state["selected_moments"] = selected_moments
         # Then try detect_moments checkpoint
         else:
@@ -370,7 +461,7 @@ def generate_report(state: PipelineState, checkpoint_mgr: CheckpointManager) ->
                 # Convert back to SelectedMoment objects
                 from src.models.state import SelectedMoment
                 moment_dicts = stage_data["selected_moments"]
-                selected_moments = [SelectedMoment(**m) for m in moment_dicts]
+                selected_moments = _moments_from_columns(moment_dicts, SelectedMoment)
                 state["selected_moments"] = selected_moments
     
     # Simulate report generation
@@ -386,6 +477,37 @@ def generate_report(state: PipelineState, checkpoint_mgr: CheckpointManager) ->
     
     return state
 
+def _load_extract_frames(state: PipelineState, stage_data: Dict[str, Any]) -> None:
+    """Restore the extracted frame names from extract_frames checkpoint data."""
+    state["frames_extracted"] = _frames_from_stage_data(stage_data)
+
+def _load_moments(state: PipelineState, stage_data: Dict[str, Any]) -> None:
+    """Restore moments, and selected moments if present, from columnar checkpoint data."""
+    # Older LangGraph checkpoints store the same moments under two stages; build them only once
+    if "moments" in stage_data and not state["moments"]:
+        state["moments"] = _moments_from_columns(stage_data["moments"], VideoMoment)
+    if "selected_moments" in stage_data and state["selected_moments"] is None:
+        state["selected_moments"] = _moments_from_columns(stage_data["selected_moments"], SelectedMoment)
+
+def _load_analyze_frames(state: PipelineState, stage_data: Dict[str, Any]) -> None:
+    """Restore analysis results, plus the moments stored with them when LangGraph was used."""
+    if "analysis_results" in stage_data:
+        state["analysis_results"] = stage_data["analysis_results"]
+        _load_moments(state, stage_data)
+
+def _load_generate_report(state: PipelineState, stage_data: Dict[str, Any]) -> None:
+    """Restore the report path from generate_report checkpoint data."""
+    if "report_path" in stage_data:
+        state["report_path"] = stage_data["report_path"]
+
+# Stage index -> function restoring that stage's checkpoint data into the pipeline state
+STAGE_LOADERS: Dict[int, Callable[[PipelineState, Dict[str, Any]], None]] = {
+    STAGE_EXTRACT_FRAMES: _load_extract_frames,
+    STAGE_ANALYZE_FRAMES: _load_analyze_frames,
+    STAGE_DETECT_MOMENTS: _load_moments,
+    STAGE_GENERATE_REPORT: _load_generate_report,
+}
+
 def run_pipeline(
     video_path: str, 
     api_key: str, 
@@ -414,16 +536,14 @@ def run_pipeline(
         video_path=video_path
     )
     
-    # Register pipeline stages
-    register_pipeline_stages(checkpoint_mgr)
+    # Create and register the pipeline stages
+    stages = create_pipeline(use_langgraph)
+    register_pipeline_stages(checkpoint_mgr, stages)
     
     # Reset if requested
     if reset:
         checkpoint_mgr.reset()
     
-    # Create pipeline stages
-    stages = create_pipeline(use_langgraph)
-    
     # Determine starting stage
     if start_stage is not None:
         next_stage_index = start_stage
@@ -439,65 +559,99 @@ def run_pipeline(
         "error": None,
         "frames_extracted": None,
         "analysis_results": None,
+        "video_metadata": None,
         "report_path": None
     }
     
-    # Load data from checkpoint for stages that were already completed
-    for stage in stages:
-        if checkpoint_mgr.is_stage_completed(stage.index):
-            stage_data = checkpoint_mgr.get_stage_data(stage.index)
-            if stage_data:
-                if stage.index == STAGE_EXTRACT_FRAMES and "frames" in stage_data:
-                    state["frames_extracted"] = stage_data["frames"]
-                elif stage.index == STAGE_ANALYZE_FRAMES and "analysis_results" in stage_data:
-                    state["analysis_results"] = stage_data["analysis_results"]
-                    # Also check for moments in case LangGraph was used
-                    if "moments" in stage_data:
-                        state["moments"] = [VideoMoment(**m) for m in stage_data["moments"]]
-                    # Also check for selected moments
-                    if "selected_moments" in stage_data:
-                        state["selected_moments"] = [SelectedMoment(**m) for m in stage_data["selected_moments"]]
-                elif stage.index == STAGE_DETECT_MOMENTS and "moments" in stage_data:
-                    # Convert moment dicts back to objects
-                    moment_dicts = stage_data["moments"]
-                    state["moments"] = [VideoMoment(**m) for m in moment_dicts]
-                    # Also check for selected moments
-                    if "selected_moments" in stage_data:
-                        state["selected_moments"] = [SelectedMoment(**m) for m in stage_data["selected_moments"]]
-                elif stage.index == STAGE_GENERATE_REPORT and "report_path" in stage_data:
-                    state["report_path"] = stage_data["report_path"]
-    
-    # Execute pipeline from the starting stage
+    # Load data from checkpoint for stages that were already completed, read in one pass.
+    # Stages from next_stage_index on are re-executed, so their old data isn't read at all
+    completed_data = checkpoint_mgr.load_all(before=next_stage_index)
     for stage in stages:
-        if stage.index < next_stage_index:
-            logging.info(f"Skipping stage {stage.index}: {stage.name} (already completed)")
-            continue
-        
-        # Skip detect_moments if using LangGraph and we already have moments
-        if stage.index == STAGE_DETECT_MOMENTS and use_langgraph and state.get("moments"):
-            logging.info(f"Skipping stage {stage.index}: {stage.name} (handled by LangGraph)")
-            continue
+        stage_data = completed_data.get(stage.index)
+        loader = STAGE_LOADERS.get(stage.index)
+        if stage_data and loader is not None:
+            loader(state, stage_data)
+    
+    # Execute pipeline from the starting stage. Stage completions are kept in memory and
+    # written together when the loop ends, including when a stage fails or raises
+    with checkpoint_mgr.batch():
+        for stage in stages:
+            if stage.index < next_stage_index:
+                logging.info(f"Skipping stage {stage.index}: {stage.name} (already completed)")
+                continue
         
-        logging.info(f"Executing stage {stage.index}: {stage.name}")
+            logging.info(f"Executing stage {stage.index}: {stage.name}")
         
-        try:
-            # Execute the stage function
-            state = stage.func(state, checkpoint_mgr)
+            try:
+                # Execute the stage function
+                state = stage.func(state, checkpoint_mgr)
             
-            # Check for errors
-            if state.get("error"):
-                logging.error(f"Pipeline failed at stage {stage.index}: {state['error']}")
-                break
+                # Check for errors
+                if state.get("error"):
+                    logging.error(f"Pipeline failed at stage {stage.index}: {state['error']}")
+                    break
                 
-        except Exception as e:
-            error_msg = f"Exception in stage {stage.index}: {str(e)}"
-            logging.exception(error_msg)
-            checkpoint_mgr.add_error(stage.index, stage.name, error_msg)
-            state["error"] = error_msg
-            break
+            except Exception as e:
+                error_msg = f"Exception in stage {stage.index}: {str(e)}"
+                logging.exception(error_msg)
+                checkpoint_mgr.add_error(stage.index, stage.name, error_msg)
+                state["error"] = error_msg
+                break
+    
+    # Make sure background checkpoint writes reach disk before returning
+    checkpoint_mgr.close()
     
     return state
 
+async def run_pipeline_async(video_path: str, api_key: str, **kwargs) -> Dict[str, Any]:
+    """
+    Run the pipeline for one video without blocking the event loop.
+    
+    The stages are blocking (LLM calls, ffmpeg, checkpoint I/O), so the whole run
+    executes in a worker thread and can be awaited alongside other runs.
+    
+    Args:
+        video_path: Path to video file
+        api_key: API key for video processing service
+        **kwargs: Any other run_pipeline argument
+        
+    Returns:
+        Final pipeline state
+    """
+    return await asyncio.to_thread(run_pipeline, video_path, api_key, **kwargs)
+
+def run_pipeline_batch(
+    video_paths: List[str],
+    api_key: str,
+    max_concurrent: int = 4,
+    **kwargs
+) -> List[Dict[str, Any]]:
+    """
+    Run the pipeline for several videos concurrently.
+    
+    Each video has its own checkpoint file, so the runs are independent; their
+    LLM waits and checkpoint writes overlap instead of running back to back.
+    
+    Args:
+        video_paths: Paths to the video files
+        api_key: API key for video processing service
+        max_concurrent: Maximum number of pipelines running at once
+        **kwargs: Any other run_pipeline argument, applied to every video
+        
+    Returns:
+        Final pipeline state for each video, in the order of video_paths
+    """
+    async def run_all() -> List[Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(max_concurrent)
+        
+        async def run_one(video_path: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await run_pipeline_async(video_path, api_key, **kwargs)
+        
+        return await asyncio.gather(*(run_one(video_path) for video_path in video_paths))
+    
+    return asyncio.run(run_all())
+
 if __name__ == "__main__":
     import os
     logging.basicConfig(level=logging.INFO)
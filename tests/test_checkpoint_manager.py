@@ -0,0 +1,266 @@
+"""Tests for the resumable checkpoint manager."""
+
+import json
+
+import pytest
+
+from src.utils import checkpoint_manager
+from src.utils.checkpoint_manager import CheckpointManager
+
+
+class _Clock:
+    """Stands in for the time module so every timestamp, and so every backup name, is distinct."""
+
+    def __init__(self):
+        self.now = 1_700_000_000
+
+    def time(self):
+        self.now += 1
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = _Clock()
+    monkeypatch.setattr(checkpoint_manager, "time", fake)
+    return fake
+
+
+def _manager(tmp_path, **kwargs):
+    return CheckpointManager(checkpoint_dir=str(tmp_path), video_path="video.mp4", **kwargs)
+
+
+def _reload(tmp_path, **kwargs):
+    manager = _manager(tmp_path, **kwargs)
+    manager.close()
+    return manager
+
+
+def test_unflushed_stage_data_survives_snapshot(tmp_path):
+    """A snapshot taken before flush() must still write the held-back stage data."""
+    mgr = _manager(tmp_path)
+    mgr.mark_stage_complete(0, "extract_frames", {"frame_count": 3}, flush=False)
+    mgr.checkpoint()
+    mgr.flush()
+    mgr.close()
+
+    reloaded = _reload(tmp_path)
+    assert reloaded.is_stage_completed(0)
+    assert reloaded.get_stage_data(0) == {"frame_count": 3}
+
+
+def test_batched_stage_data_survives_register_stages(tmp_path):
+    mgr = _manager(tmp_path)
+    with mgr.batch():
+        mgr.mark_stage_complete(0, "extract_frames", {"frame_count": 3})
+        mgr.register_stages([(0, "extract_frames", "Extract key frames from video")])
+    mgr.close()
+
+    assert _reload(tmp_path).get_stage_data(0) == {"frame_count": 3}
+
+
+def _stage_files(tmp_path):
+    return sorted(p.name for p in tmp_path.glob("checkpoint_video.stages/*"))
+
+
+def test_backup_keeps_the_stage_data_it_was_taken_with(tmp_path, clock):
+    mgr = _manager(tmp_path, max_backups=5)
+    mgr.mark_stage_complete(0, "extract_frames", {"frame_count": 1})
+    mgr.mark_stage_complete(0, "extract_frames", {"frame_count": 2})
+    mgr.checkpoint()
+    mgr.close()
+
+    (backup,) = tmp_path.glob("checkpoint_video_backup_*.json")
+    backup_stage_file = json.loads(backup.read_bytes())["stage_files"]["0"]
+    assert json.loads((tmp_path / backup_stage_file).read_bytes()) == {"frame_count": 1}
+    assert _reload(tmp_path).get_stage_data(0) == {"frame_count": 2}
+
+
+def test_pruning_backups_removes_stage_files_only_they_referenced(tmp_path, clock):
+    mgr = _manager(tmp_path, max_backups=1)
+    for frame_count in range(1, 5):
+        mgr.mark_stage_complete(0, "extract_frames", {"frame_count": frame_count})
+        mgr.checkpoint()
+    mgr.close()
+
+    # The current data and the single kept backup each reference one version
+    assert len(_stage_files(tmp_path)) == 2
+    assert _reload(tmp_path).get_stage_data(0) == {"frame_count": 4}
+
+
+def test_reset_removes_unreferenced_stage_files(tmp_path, clock):
+    mgr = _manager(tmp_path)
+    for _ in range(3):
+        mgr.mark_stage_complete(0, "extract_frames", {"frame_count": 3})
+        mgr.reset()
+    mgr.close()
+
+    # Only the two reset backups kept by reset() still reference stage data
+    assert len(_stage_files(tmp_path)) == 2
+    assert _reload(tmp_path).get_stage_data(0) is None
+
+
+def test_pruning_leaves_other_videos_checkpoints_alone(tmp_path, clock):
+    # This video's checkpoint name looks like a stage file name of clip.mp4
+    other = CheckpointManager(checkpoint_dir=str(tmp_path), video_path="clip_stage_0_1.mp4")
+    other.mark_stage_complete(0, "extract_frames", {"frame_count": 7})
+    other.checkpoint()
+    other.close()
+
+    mgr = CheckpointManager(checkpoint_dir=str(tmp_path), video_path="clip.mp4")
+    for frame_count in range(3):
+        mgr.mark_stage_complete(0, "extract_frames", {"frame_count": frame_count})
+    mgr.reset()
+    mgr.close()
+    CheckpointManager.cleanup_all_backups(str(tmp_path), max_backups_per_file=0)
+
+    reloaded = CheckpointManager(checkpoint_dir=str(tmp_path), video_path="clip_stage_0_1.mp4")
+    reloaded.close()
+    assert reloaded.get_stage_data(0) == {"frame_count": 7}
+    listed = {c["file"] for c in CheckpointManager.list_all_checkpoints(str(tmp_path))}
+    assert listed == {"checkpoint_clip.json", "checkpoint_clip_stage_0_1.json"}
+
+
+def test_background_save_failure_is_raised(tmp_path, monkeypatch):
+    mgr = _manager(tmp_path)
+    mgr.mark_stage_complete(0, "extract_frames", {"frame_count": 3})
+
+    def fail(data, create_backup):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(mgr, "_write_snapshot", fail)
+    mgr.save_async()
+    with pytest.raises(OSError, match="disk full"):
+        mgr.wait_for_saves()
+    # Reported once; closing afterwards succeeds
+    mgr.close()
+
+
+def test_close_raises_background_save_failure(tmp_path, monkeypatch):
+    mgr = _manager(tmp_path)
+    monkeypatch.setattr(mgr, "_write_snapshot", lambda data, create_backup: 1 / 0)
+    mgr.save_async()
+    with pytest.raises(ZeroDivisionError):
+        mgr.close()
+
+
+def test_journal_replayed_after_interrupted_run(tmp_path):
+    mgr = _manager(tmp_path)
+    mgr.mark_stage_complete(0, "extract_frames", {"frame_count": 3})
+    mgr.mark_stage_complete(1, "analyze_frames", {"analysis_results": {"activity_level": "high"}})
+    mgr.add_error(2, "detect_moments", "boom")
+    # Simulate a crash: no close(), and a torn entry at the end of the journal
+    with open(mgr._journal_path, "ab") as f:
+        f.write(b'{"op": "stage_complete", "idx": 2')
+
+    reloaded = _reload(tmp_path)
+    assert reloaded.data["stages_completed"] == [0, 1]
+    assert reloaded.get_next_stage() == 2
+    assert reloaded.get_stage_data(1) == {"analysis_results": {"activity_level": "high"}}
+    assert [e["message"] for e in reloaded.data["errors"]] == ["boom"]
+
+
+def test_batch_is_written_on_exit(tmp_path):
+    mgr = _manager(tmp_path)
+    mgr.register_stages([(0, "extract_frames", ""), (1, "analyze_frames", "")])
+    with mgr.batch():
+        mgr.mark_stage_complete(0, "extract_frames", {"frame_count": 3})
+        mgr.mark_stage_complete(1, "analyze_frames", {"analysis_results": {}})
+        # Applied in memory, but nothing is on disk until the block exits
+        assert mgr.is_stage_completed(1)
+        assert _manager(tmp_path).data["stages_completed"] == []
+
+    reloaded = _reload(tmp_path)
+    assert reloaded.data["stages_completed"] == [0, 1]
+    assert reloaded.get_stage_data(0) == {"frame_count": 3}
+
+
+def test_unflushed_completion_is_written_by_flush(tmp_path):
+    mgr = _manager(tmp_path)
+    mgr.register_stages([(0, "extract_frames", "")])
+    mgr.mark_stage_complete(0, "extract_frames", {"frame_count": 3}, flush=False)
+    assert mgr.get_stage_data(0) == {"frame_count": 3}
+    assert not _reload(tmp_path).is_stage_completed(0)
+
+    mgr.flush()
+    reloaded = _reload(tmp_path)
+    assert reloaded.is_stage_completed(0)
+    assert reloaded.get_stage_data(0) == {"frame_count": 3}
+
+
+def test_snapshot_every_folds_the_journal_into_a_snapshot(tmp_path):
+    mgr = _manager(tmp_path, snapshot_every=3)
+    mgr.mark_stage_complete(0, "extract_frames", {"frame_count": 3})
+    mgr.mark_stage_complete(1, "analyze_frames")
+    mgr.mark_stage_complete(2, "detect_moments")
+    assert mgr._journal_path.exists()
+
+    mgr.mark_stage_complete(3, "generate_report", {"report_path": "output/report.html"})
+    mgr.wait_for_saves()
+    assert not mgr._journal_path.exists()
+    snapshot = json.loads(mgr.checkpoint_path.read_bytes())
+    assert snapshot["stages_completed"] == [0, 1, 2, 3]
+    mgr.close()
+
+    assert _reload(tmp_path).get_stage_data(3) == {"report_path": "output/report.html"}
+
+
+def test_reset_clears_state_and_keeps_a_backup(tmp_path):
+    mgr = _manager(tmp_path)
+    mgr.register_stages([(0, "extract_frames", "Extract key frames from video")])
+    mgr.mark_stage_complete(0, "extract_frames", {"frame_count": 3})
+    mgr.reset()
+
+    assert not mgr.is_stage_completed(0)
+    assert mgr.get_next_stage() == 0
+    assert mgr.get_stage_data(0) is None
+    assert mgr.get_stage_name(0) == "extract_frames"
+    (backup,) = tmp_path.glob("checkpoint_video_reset_*.json")
+    assert json.loads(backup.read_bytes())["stages_completed"] == [0]
+    mgr.close()
+
+    reloaded = _reload(tmp_path)
+    assert reloaded.data["stages_completed"] == []
+    assert reloaded.load_all() == {}
+
+
+@pytest.mark.parametrize("checkpoint_format", ["json", "msgpack"])
+def test_stage_data_after_reload(tmp_path, checkpoint_format):
+    if checkpoint_format == "msgpack":
+        pytest.importorskip("msgpack")
+    mgr = _manager(tmp_path, checkpoint_format=checkpoint_format)
+    mgr.mark_stage_complete(0, "extract_frames", {"frame_pattern": "frame_{}.jpg", "frame_count": 3})
+    mgr.mark_stage_complete(1, "analyze_frames")
+    mgr.close()
+
+    reloaded = _reload(tmp_path, checkpoint_format=checkpoint_format)
+    assert reloaded.get_stage_data(0) == {"frame_pattern": "frame_{}.jpg", "frame_count": 3}
+    assert reloaded.get_stage_data(1) is None
+    assert reloaded.load_all(before=1) == {0: {"frame_pattern": "frame_{}.jpg", "frame_count": 3}}
+
+
+def test_next_stage_skips_unregistered_indices(tmp_path):
+    # The LangGraph pipeline registers no detect_moments stage (index 2)
+    stages = [(0, "extract_frames", ""), (1, "analyze_frames", ""), (3, "generate_report", "")]
+    mgr = _manager(tmp_path)
+    mgr.register_stages(stages)
+    mgr.mark_stage_complete(0, "extract_frames", {"frame_count": 3})
+    mgr.mark_stage_complete(1, "analyze_frames")
+    assert mgr.get_next_stage() == 3
+    assert mgr.list_checkpoints()["current_stage_name"] == "generate_report"
+    mgr.close()
+
+    reloaded = _manager(tmp_path)
+    reloaded.register_stages(stages)
+    assert reloaded.get_next_stage() == 3
+    reloaded.close()
+
+
+def test_mutating_loaded_stage_data_does_not_leak(tmp_path):
+    mgr = _manager(tmp_path)
+    mgr.mark_stage_complete(0, "extract_frames", {"moments": [{"start_time": 1.0}]})
+    mgr.close()
+
+    first = _reload(tmp_path).get_stage_data(0)
+    first["moments"].append({"start_time": 2.0})
+    assert _reload(tmp_path).get_stage_data(0) == {"moments": [{"start_time": 1.0}]}
@@ -0,0 +1,9 @@
+"""Tests for the shared utility helpers."""
+
+from src.utils import format_duration
+
+
+def test_format_duration():
+    assert format_duration(0) == "00:00"
+    assert format_duration(75.9) == "01:15"
+    assert format_duration(3600) == "60:00"